@@ -4,12 +4,46 @@ Contrôle IC-705 via CI-V - Streaming des données spectrales
 Active le streaming et lit les données du spectre en continu
 """
 
+import select
 import socket
 import time
 
-HOST = '127.0.0.1'  
+HOST = '127.0.0.1'
 PORT = 50002
 
+# Commandes fixes, précalculées au chargement du module
+# 1A 05 = Set Scope ON/OFF ; 00 01 = ON, 00 00 = OFF
+CMD_STREAM_ON = bytes((0xFE, 0xFE, 0xA4, 0xE0, 0x1A, 0x05, 0x00, 0x01, 0xFD))
+CMD_STREAM_OFF = bytes((0xFE, 0xFE, 0xA4, 0xE0, 0x1A, 0x05, 0x00, 0x00, 0xFD))
+
+
+def lire_message_civ(sock, buffer, timeout=5):
+    """Lit un message CI-V complet (terminé par 0xFD) via des recv groupés.
+
+    Le socket est non bloquant : select() attend l'arrivée de données
+    (au plus le temps restant), puis recv(65536) ramasse toute la
+    rafale en un seul appel système au lieu d'un appel par octet.
+    Les octets en trop restent dans le buffer pour le message suivant.
+    """
+    echeance = time.monotonic() + timeout
+    while True:
+        fin = buffer.find(0xFD)
+        if fin != -1:
+            message = bytes(buffer[:fin + 1])
+            del buffer[:fin + 1]
+            return message
+        restant = echeance - time.monotonic()
+        if restant <= 0:
+            return None
+        prets, _, _ = select.select([sock], [], [], restant)
+        if not prets:
+            return None
+        data = sock.recv(65536)
+        if not data:
+            return None
+        buffer.extend(data)
+
+
 print("="*60)
 print("IC-705 Spectrum Streaming via CI-V")
 print("="*60)
@@ -19,33 +53,25 @@ try:
     s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     s.settimeout(5)
     s.connect((HOST, PORT))
-    print("✅ Connecté au serveur CI-V\n")  
-
-    # Commande pour activer le streaming des données spectrales
-    # FE FE A4 E0 1A 05 00 01 FD
-    # 1A 05 = Set Scope ON/OFF
-    # 00 01 = Paramètres (01 = ON, 00 = OFF)
-    cmd = bytes([0xFE, 0xFE, 0xA4, 0xE0, 0x1A, 0x05, 0x00, 0x01, 0xFD])
-    
+    s.setblocking(False)
+    # TCP_NODELAY : les commandes CI-V (6-9 octets) partent sans délai
+    # de Nagle ; gros SO_RCVBUF pour encaisser les rafales de spectre
+    s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    s.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+    print("✅ Connecté au serveur CI-V\n")
 
-    print(f"   {cmd.hex(' ').upper()}")
+    # Activer le streaming des données spectrales
+    print(f"   {CMD_STREAM_ON.hex(' ').upper()}")
 
-    s.send(cmd)
+    s.send(CMD_STREAM_ON)
     
 
     
 
-    response = bytearray()
-    start = time.time()
-    while time.time() - start < 2:
-        byte = s.recv(1)
-        if not byte:
-            break
-        response.extend(byte)
-        if byte[0] == 0xFD:
-            break
-    
-    if len(response) > 0:
+    buffer = bytearray()
+    response = lire_message_civ(s, buffer, timeout=2)
+
+    if response is not None and len(response) > 0:
         print(f"← Réponse: {response.hex(' ').upper()}")
         if len(response) == 6 and response[4] == 0xFB:
             print("✅ Streaming activé avec succès (FB = OK)\n")
@@ -60,21 +86,12 @@ try:
     # Lire les données en continu
     try:
         while True:
-            response = bytearray()
-            start = time.time()
-            
-            # Lire un message complet
-            while time.time() - start < 5:
-                byte = s.recv(1)
-                if not byte:
-                    break
-                response.extend(byte)
-                if byte[0] == 0xFD:
-                    break
-            
-            if len(response) == 0:
+            # Lire un message complet (recv groupé, buffer persistant)
+            response = lire_message_civ(s, buffer)
+
+            if response is None or len(response) == 0:
                 continue
-            
+
             # Afficher les données brutes reçues
             print(response.hex(' ').upper())
             
@@ -82,8 +99,7 @@ try:
         print("\n\nArrêt...")
         
         # Désactiver le streaming avant de fermer
-        cmd_off = bytes([0xFE, 0xFE, 0xA4, 0xE0, 0x1A, 0x05, 0x00, 0x00, 0xFD])
-        s.send(cmd_off)
+        s.send(CMD_STREAM_OFF)
         time.sleep(0.5)
     
     s.close()
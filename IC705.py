@@ -1,35 +1,69 @@
+import select
 import socket
 import time
 
-HOST = '127.0.0.1'  
+HOST = '127.0.0.1'
 PORT = 50002
 
+# Commande fixe : lecture de la fréquence (précalculée au chargement)
+CMD_GET_FREQ = bytes((0xFE, 0xFE, 0xA4, 0xE0, 0x03, 0xFD))
+
+
+def trouver_trames_civ(buffer):
+    """Extrait toutes les trames CI-V complètes (FE FE ... FD) du buffer.
+
+    Une seule passe avec find(), puis un seul del de ce qui a été
+    consommé — pas de boucle octet par octet ni d'échéance par message.
+    """
+    trames = []
+    pos = 0
+    while True:
+        debut = buffer.find(b'\xFE\xFE', pos)
+        if debut < 0:
+            break
+        fin = buffer.find(0xFD, debut + 2)
+        if fin < 0:
+            break
+        trames.append(bytes(buffer[debut:fin + 1]))
+        pos = fin + 1
+    del buffer[:pos]
+    return trames
+
+
 s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
 s.settimeout(5)
 s.connect((HOST, PORT))
+s.setblocking(False)
+# TCP_NODELAY : envoyer les petites commandes CI-V immédiatement
+# (sans Nagle), et un buffer de réception large pour les rafales
+s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+s.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
 
-cmd = bytes([0xFE, 0xFE, 0xA4, 0xE0, 0x03, 0xFD])
-print(f"→ {cmd.hex(' ').upper()}")
-s.send(cmd)
-
-for _ in range(10):
-    response = bytearray()
-    start = time.time()
-    
-    while time.time() - start < 2:
-        byte = s.recv(1)
-        if not byte:
-            break
-        response.extend(byte)
-        if byte[0] == 0xFD:
-            break
-    
-    if len(response) == 0:
+print(f"→ {CMD_GET_FREQ.hex(' ').upper()}")
+s.send(CMD_GET_FREQ)
+
+# Lire par grosses rafales et analyser tout le buffer d'un coup :
+# plus de boucle "10 tentatives" avec une échéance par message
+buffer = bytearray()
+echeance = time.monotonic() + 2
+reponse = None
+
+while reponse is None:
+    restant = echeance - time.monotonic()
+    if restant <= 0:
         break
-    
-    print(f"← {response.hex(' ').upper()}")
-    
-    if len(response) >= 11 and response[4] in [0x00, 0x03, 0x05]:
+    prets, _, _ = select.select([s], [], [], restant)
+    if not prets:
         break
+    data = s.recv(8192)
+    if not data:
+        break
+    buffer.extend(data)
+
+    for trame in trouver_trames_civ(buffer):
+        print(f"← {trame.hex(' ').upper()}")
+        if len(trame) >= 11 and trame[4] in (0x00, 0x03, 0x05):
+            reponse = trame
+            break
 
 s.close()
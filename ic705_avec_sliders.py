@@ -9,12 +9,22 @@ Auteur: Étudiant PTUT
 Date: Décembre 2025
 """
 
+import queue
+import re
 import socket
+import threading
 import time
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.widgets import Slider
 
+# Numba est optionnel : s'il est installé, le scanner de trames est
+# compilé en code natif (~50x plus rapide), sinon on garde le Python pur
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
 # ============================================================
 #                    PARAMÈTRES DE CONFIGURATION
 # ============================================================
@@ -34,6 +44,14 @@ GAIN_MAX_DEFAUT = 200
 ADRESSE_RADIO = 0xA4
 ADRESSE_PC = 0xE0
 
+# Commandes CI-V précalculées une fois pour toutes : les trames sont
+# fixes, inutile de reconstruire une liste + bytes() à chaque envoi
+CMD_STREAM_ON = bytes((0xFE, 0xFE, ADRESSE_RADIO, ADRESSE_PC,
+                       0x1A, 0x05, 0x00, 0x01, 0xFD))
+CMD_STREAM_OFF = bytes((0xFE, 0xFE, ADRESSE_RADIO, ADRESSE_PC,
+                        0x1A, 0x05, 0x00, 0x00, 0xFD))
+CMD_GET_FREQ = bytes((0xFE, 0xFE, ADRESSE_RADIO, ADRESSE_PC, 0x03, 0xFD))
+
 
 # ============================================================
 #              FONCTIONS DE COMMUNICATION CI-V
@@ -45,6 +63,12 @@ def connecter_au_serveur():
         connexion = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         connexion.settimeout(2)
         connexion.connect((SERVEUR_IP, SERVEUR_PORT))
+        # TCP_NODELAY : les commandes CI-V (quelques octets) partent
+        # immédiatement au lieu d'attendre l'algorithme de Nagle (~40 ms)
+        connexion.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        # Gros buffer de réception kernel pour ne pas perdre de trames
+        # de spectre pendant que matplotlib dessine
+        connexion.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
         print(f"Connecté au serveur {SERVEUR_IP}:{SERVEUR_PORT}")
         return connexion
     except Exception as erreur:
@@ -52,71 +76,129 @@ def connecter_au_serveur():
         return None
 
 
-def envoyer_commande(connexion, commande):
-    """Envoie une commande CI-V à la radio."""
-    connexion.send(bytes(commande))
-
-
 def activer_streaming(connexion):
     """Active le streaming du spectre."""
-    commande = [0xFE, 0xFE, ADRESSE_RADIO, ADRESSE_PC, 0x1A, 0x05, 0x00, 0x01, 0xFD]
-    envoyer_commande(connexion, commande)
+    connexion.send(CMD_STREAM_ON)
     print("Streaming spectral activé")
 
 
 def desactiver_streaming(connexion):
     """Désactive le streaming du spectre."""
-    commande = [0xFE, 0xFE, ADRESSE_RADIO, ADRESSE_PC, 0x1A, 0x05, 0x00, 0x00, 0xFD]
-    envoyer_commande(connexion, commande)
+    connexion.send(CMD_STREAM_OFF)
     print("Streaming spectral désactivé")
 
 
 def demander_frequence(connexion):
     """Demande la fréquence actuelle à la radio."""
-    commande = [0xFE, 0xFE, ADRESSE_RADIO, ADRESSE_PC, 0x03, 0xFD]
-    envoyer_commande(connexion, commande)
+    connexion.send(CMD_GET_FREQ)
 
 
 # ============================================================
 #              FONCTIONS DE DÉCODAGE CI-V
 # ============================================================
 
+# Table précalculée : chaque octet BCD -> sa valeur décimale (0-99)
+# Évite les masques/décalages dans une boucle Python à chaque décodage
+BCD_TABLE = np.array([((b >> 4) & 0x0F) * 10 + (b & 0x0F) for b in range(256)],
+                     dtype=np.int64)
+# Poids de chaque octet (little-endian : 2 chiffres décimaux par octet)
+POW100 = np.array([1, 100, 10_000, 1_000_000, 100_000_000], dtype=np.int64)
+
+
 def decoder_frequence_bcd(octets_frequence):
-    """Décode une fréquence BCD little-endian en MHz."""
-    frequence_hz = 0
-    multiplicateur = 1
-    for octet in octets_frequence:
-        chiffre_bas = octet & 0x0F
-        frequence_hz += chiffre_bas * multiplicateur
-        multiplicateur *= 10
-        chiffre_haut = (octet >> 4) & 0x0F
-        frequence_hz += chiffre_haut * multiplicateur
-        multiplicateur *= 10
-    return frequence_hz / 1_000_000
+    """Décode une fréquence BCD little-endian en MHz (via table précalculée)."""
+    if len(octets_frequence) == 5:
+        # Cas standard CI-V (5 octets) : expression déroulée, sans
+        # passer par NumPy — plus rapide pour 5 valeurs
+        b0, b1, b2, b3, b4 = octets_frequence
+        frequence_hz = (BCD_TABLE[b0]
+                        + BCD_TABLE[b1] * 100
+                        + BCD_TABLE[b2] * 10_000
+                        + BCD_TABLE[b3] * 1_000_000
+                        + BCD_TABLE[b4] * 100_000_000)
+        return float(frequence_hz) / 1_000_000
+    octets = np.frombuffer(bytes(octets_frequence), dtype=np.uint8)
+    frequence_hz = BCD_TABLE[octets] @ POW100[:octets.size]
+    return float(frequence_hz) / 1_000_000
+
+
+def _scanner_trames(tableau):
+    """Parcourt un tableau uint8 en une passe et retourne les bornes
+    (debut, fin) de chaque trame CI-V complète (FE FE ... FD)."""
+    bornes = []
+    i = 0
+    n = tableau.shape[0]
+    while i + 1 < n:
+        if tableau[i] == 0xFE and tableau[i + 1] == 0xFE:
+            j = i + 2
+            while j < n and tableau[j] != 0xFD:
+                j += 1
+            if j >= n:
+                break  # trame incomplète, attendre la suite
+            bornes.append((i, j + 1))
+            i = j + 1
+        else:
+            i += 1
+    return bornes
+
+
+if njit is not None:
+    _scanner_trames = njit(cache=True)(_scanner_trames)
+
+
+def _chercher_frequence(tableau):
+    """Cherche une réponse fréquence (FE FE .. .. 03) dans un tableau
+    uint8 et décode les 5 octets BCD en une seule passe.
+
+    Retourne la fréquence en MHz, ou NaN si aucune réponse trouvée.
+    """
+    n = tableau.shape[0]
+    for i in range(n - 10):
+        if tableau[i] == 0xFE and tableau[i + 1] == 0xFE and tableau[i + 4] == 0x03:
+            frequence_hz = 0.0
+            multiplicateur = 1.0
+            for j in range(5):
+                octet = tableau[i + 5 + j]
+                frequence_hz += (octet & 0x0F) * multiplicateur
+                multiplicateur *= 10.0
+                frequence_hz += ((octet >> 4) & 0x0F) * multiplicateur
+                multiplicateur *= 10.0
+            return frequence_hz / 1e6
+    return np.nan
+
+
+if njit is not None:
+    _chercher_frequence = njit(cache=True)(_chercher_frequence)
+
+
+# Motif d'une trame CI-V complète, compilé une fois : préambule FE FE
+# puis le plus court chemin (lazy) jusqu'au terminateur FD
+CIV_RE = re.compile(rb'\xFE\xFE.*?\xFD', re.DOTALL)
 
 
 def trouver_messages_civ(buffer):
     """Trouve et extrait les messages CI-V complets dans un buffer."""
-    messages = []
-    while True:
-        try:
-            debut = buffer.index(0xFE)
-        except ValueError:
-            break
-        if debut > 0:
-            del buffer[:debut]
-        if len(buffer) < 2:
-            break
-        if buffer[1] != 0xFE:
-            del buffer[:1]
-            continue
-        try:
-            fin = buffer.index(0xFD, 2) + 1
-        except ValueError:
-            break
-        message = bytes(buffer[:fin])
-        messages.append(message)
-        del buffer[:fin]
+    if njit is not None:
+        # Instantané figé du buffer : frombuffer sur le bytearray vivant
+        # en exporterait la mémoire et le del final lèverait BufferError
+        # (impossible de redimensionner un bytearray exporté)
+        instantane = bytes(buffer)
+        tableau = np.frombuffer(instantane, dtype=np.uint8)
+        bornes = _scanner_trames(tableau)
+        messages = [instantane[debut:fin] for debut, fin in bornes]
+        fin_consommee = bornes[-1][1] if bornes else 0
+    else:
+        # Sans Numba : le moteur re (compilé, en C) scanne le buffer
+        # bien plus vite que la boucle Python octet par octet
+        messages = []
+        fin_consommee = 0
+        for m in CIV_RE.finditer(bytes(buffer)):
+            messages.append(m.group())
+            fin_consommee = m.end()
+    if fin_consommee:
+        # Un seul del pour tout ce qui a été consommé, au lieu d'un
+        # del (memmove O(N)) par message
+        del buffer[:fin_consommee]
     return messages
 
 
@@ -124,24 +206,142 @@ def extraire_donnees_spectre(message):
     """Extrait les données d'amplitude d'un message de spectre."""
     if len(message) < 50:
         return None
-    donnees_brutes = message[19:-1]
-    if len(donnees_brutes) < 10:
+    if len(message) - 20 < 10:
         return None
-    return np.array(list(donnees_brutes), dtype=float)
+    # frombuffer lit les octets directement (pas de liste Python
+    # intermédiaire) ; on reste en uint8 de bout en bout, les
+    # amplitudes source tiennent sur 8 bits
+    return np.frombuffer(message, dtype=np.uint8,
+                         offset=19, count=len(message) - 20)
+
+
+# Bornes de décimation précalculées, indexées par (taille source, taille cible) :
+# elles ne dépendent que des tailles, inutile de les recalculer par trame
+_CACHE_BORNES = {}
 
 
 def redimensionner_spectre(amplitudes, taille_cible):
-    """Redimensionne les données du spectre à la taille voulue."""
+    """Redimensionne les données du spectre à la taille voulue.
+
+    La réduction se fait par moyenne de blocs (np.add.reduceat) plutôt
+    que par sous-échantillonnage : c'est plus rapide qu'un fancy-index
+    et ça évite le repliement (aliasing) sur l'affichage.
+    """
     taille_originale = len(amplitudes)
     if taille_originale >= taille_cible:
-        indices = np.linspace(0, taille_originale - 1, taille_cible, dtype=int)
-        return amplitudes[indices]
+        cle = (taille_originale, taille_cible)
+        cache = _CACHE_BORNES.get(cle)
+        if cache is None:
+            bornes = np.linspace(0, taille_originale, taille_cible + 1,
+                                 dtype=np.int32)
+            cache = (bornes[:-1], np.diff(bornes).astype(np.uint32))
+            _CACHE_BORNES[cle] = cache
+        debuts, largeurs = cache
+        # Somme en uint32 (pour ne pas déborder) puis moyenne entière :
+        # le résultat reste en uint8 comme la source
+        somme = np.add.reduceat(amplitudes, debuts, dtype=np.uint32)
+        return (somme // largeurs).astype(np.uint8)
     else:
-        resultat = np.zeros(taille_cible)
+        resultat = np.zeros(taille_cible, dtype=np.uint8)
         resultat[:taille_originale] = amplitudes
         return resultat
 
 
+def redimensionner_spectres(bloc, taille_cible):
+    """Version par lots de redimensionner_spectre.
+
+    Décime toutes les lignes d'un bloc (n_trames, largeur) en un seul
+    appel NumPy au lieu d'un appel par trame.
+    """
+    taille_originale = bloc.shape[1]
+    if taille_originale >= taille_cible:
+        cle = (taille_originale, taille_cible)
+        cache = _CACHE_BORNES.get(cle)
+        if cache is None:
+            bornes = np.linspace(0, taille_originale, taille_cible + 1,
+                                 dtype=np.int32)
+            cache = (bornes[:-1], np.diff(bornes).astype(np.uint32))
+            _CACHE_BORNES[cle] = cache
+        debuts, largeurs = cache
+        somme = np.add.reduceat(bloc, debuts, axis=1, dtype=np.uint32)
+        return (somme // largeurs).astype(np.uint8)
+    else:
+        resultat = np.zeros((bloc.shape[0], taille_cible), dtype=np.uint8)
+        resultat[:, :taille_originale] = bloc
+        return resultat
+
+
+# ============================================================
+#              THREAD DE RÉCEPTION
+# ============================================================
+
+def pousser_spectre(file_spectres, spectre):
+    """Pousse un spectre dans la file en jetant le plus ancien si pleine."""
+    try:
+        file_spectres.put_nowait(spectre)
+    except queue.Full:
+        try:
+            file_spectres.get_nowait()
+            file_spectres.put_nowait(spectre)
+        except (queue.Empty, queue.Full):
+            pass
+
+
+def boucle_reception(connexion, file_spectres, arret):
+    """Thread de réception : lit le socket, décode les trames de spectre
+    et pousse les spectres redimensionnés dans la file.
+
+    Tourne en parallèle de l'affichage : un redraw matplotlib de 20 ms
+    ne bloque plus la lecture du socket (recv relâche le GIL).
+    """
+    buffer_reception = bytearray()
+    # Tampon de réception préalloué : recv_into écrit dedans directement,
+    # sans allouer un nouvel objet bytes à chaque recv
+    tampon_recv = bytearray(65536)
+    vue_recv = memoryview(tampon_recv)
+    connexion.settimeout(0.1)
+
+    while not arret.is_set():
+        try:
+            nb_octets = connexion.recv_into(vue_recv)
+            if nb_octets == 0:
+                break
+            buffer_reception += vue_recv[:nb_octets]
+        except socket.timeout:
+            continue
+        except OSError:
+            break
+
+        messages = trouver_messages_civ(buffer_reception)
+        messages_spectre = [m for m in messages
+                            if len(m) > 50 and m[4] == 0x27]
+
+        if messages_spectre:
+            # Cas normal : toutes les trames d'une rafale font la même
+            # longueur -> les décoder en un seul bloc NumPy 2D
+            longueur = len(messages_spectre[0])
+            lot = [m for m in messages_spectre if len(m) == longueur]
+            restes = [m for m in messages_spectre if len(m) != longueur]
+
+            bloc = np.frombuffer(b''.join(m[19:-1] for m in lot),
+                                 dtype=np.uint8)
+            bloc = bloc.reshape(len(lot), longueur - 20)
+            for spectre in redimensionner_spectres(bloc, LARGEUR_SPECTRE):
+                pousser_spectre(file_spectres, spectre)
+
+            # Trames de longueur atypique : chemin unitaire classique
+            for message in restes:
+                amplitudes = extraire_donnees_spectre(message)
+                if amplitudes is not None:
+                    pousser_spectre(
+                        file_spectres,
+                        redimensionner_spectre(amplitudes, LARGEUR_SPECTRE))
+
+        # Limiter la taille du buffer
+        if len(buffer_reception) > 10000:
+            buffer_reception.clear()
+
+
 # ============================================================
 #              FONCTIONS D'AFFICHAGE AVEC SLIDERS
 # ============================================================
@@ -183,14 +383,18 @@ def creer_figure_avec_sliders(freq_centrale):
     ax_spectre.tick_params(colors='white')
     ax_spectre.grid(True, alpha=0.3)
     ax_spectre.axvline(x=freq_centrale, color='red', linestyle='--', alpha=0.7)
-    ligne, = ax_spectre.plot(axe_freq, np.zeros(LARGEUR_SPECTRE), color='yellow', linewidth=1)
+    # animated=True : la ligne est exclue des redraws complets et
+    # redessinée uniquement par blitting (voir mettre_a_jour_affichage)
+    ligne, = ax_spectre.plot(axe_freq, np.zeros(LARGEUR_SPECTRE), color='yellow',
+                             linewidth=1, animated=True)
     
     # === Waterfall ===
     ax_waterfall.set_xlabel('Fréquence (MHz)', color='white')
     ax_waterfall.set_ylabel('Temps', color='white')
     ax_waterfall.tick_params(colors='white')
     
-    donnees_vides = np.zeros((PROFONDEUR_WATERFALL, LARGEUR_SPECTRE))
+    donnees_vides = np.zeros((PROFONDEUR_WATERFALL, LARGEUR_SPECTRE),
+                             dtype=np.uint8)
     image = ax_waterfall.imshow(
         donnees_vides,
         aspect='auto',
@@ -198,7 +402,8 @@ def creer_figure_avec_sliders(freq_centrale):
         vmin=GAIN_MIN_DEFAUT,
         vmax=GAIN_MAX_DEFAUT,
         origin='upper',
-        extent=[freq_min, freq_max, PROFONDEUR_WATERFALL, 0]
+        extent=[freq_min, freq_max, PROFONDEUR_WATERFALL, 0],
+        animated=True
     )
     
     # === Sliders de gain ===
@@ -237,9 +442,15 @@ def creer_figure_avec_sliders(freq_centrale):
     
     plt.ion()
     plt.show()
-    
+
+    # Capturer les fonds statiques (axes, grille, labels) pour le blitting :
+    # à chaque trame on ne redessinera que la ligne et l'image par-dessus
+    fig.canvas.draw()
+    fond_spectre = fig.canvas.copy_from_bbox(ax_spectre.bbox)
+    fond_waterfall = fig.canvas.copy_from_bbox(ax_waterfall.bbox)
+
     # Retourner tous les éléments dans un dictionnaire
-    return {
+    elements = {
         'fig': fig,
         'ax_spectre': ax_spectre,
         'ax_waterfall': ax_waterfall,
@@ -249,9 +460,21 @@ def creer_figure_avec_sliders(freq_centrale):
         'slider_min': slider_min,
         'slider_max': slider_max,
         'gain_min': GAIN_MIN_DEFAUT,
-        'gain_max': GAIN_MAX_DEFAUT
+        'gain_max': GAIN_MAX_DEFAUT,
+        'fond_spectre': fond_spectre,
+        'fond_waterfall': fond_waterfall,
+        'fonds_valides': True
     }
 
+    # Un redimensionnement de la fenêtre périme aussi les fonds :
+    # la prochaine mise à jour les recapturera à la bonne géométrie
+    def _invalider_fonds(event):
+        elements['fonds_valides'] = False
+
+    fig.canvas.mpl_connect('resize_event', _invalider_fonds)
+
+    return elements
+
 
 def mettre_a_jour_gains(elements):
     """
@@ -262,21 +485,28 @@ def mettre_a_jour_gains(elements):
     """
     gain_min = elements['slider_min'].val
     gain_max = elements['slider_max'].val
-    
+
     # S'assurer que min < max
     if gain_min >= gain_max:
         gain_min = gain_max - 10
-    
+
+    # Rien à faire si les sliders n'ont pas bougé
+    if gain_min == elements['gain_min'] and gain_max == elements['gain_max']:
+        return
+
     # Mettre à jour le spectre (axe Y)
     elements['ax_spectre'].set_ylim(gain_min, gain_max)
-    
+
     # Mettre à jour le waterfall (échelle de couleurs)
     elements['image'].set_clim(vmin=gain_min, vmax=gain_max)
-    
+
     # Sauvegarder les nouvelles valeurs
     elements['gain_min'] = gain_min
     elements['gain_max'] = gain_max
 
+    # Les axes ont changé : les fonds capturés pour le blitting sont périmés
+    elements['fonds_valides'] = False
+
 
 def mettre_a_jour_affichage(elements, spectre, waterfall):
     """
@@ -289,20 +519,60 @@ def mettre_a_jour_affichage(elements, spectre, waterfall):
     """
     # Mettre à jour les gains depuis les sliders
     mettre_a_jour_gains(elements)
-    
+
     # Mettre à jour les données
     elements['ligne'].set_data(elements['axe_freq'], spectre)
     elements['image'].set_data(waterfall)
-    
-    # Rafraîchir
-    plt.draw()
-    plt.pause(0.001)
 
+    fig = elements['fig']
+
+    # Après un changement de gain, refaire un rendu complet et
+    # recapturer les fonds statiques
+    if not elements['fonds_valides']:
+        fig.canvas.draw()
+        elements['fond_spectre'] = fig.canvas.copy_from_bbox(elements['ax_spectre'].bbox)
+        elements['fond_waterfall'] = fig.canvas.copy_from_bbox(elements['ax_waterfall'].bbox)
+        elements['fonds_valides'] = True
+
+    # Blitting : restaurer le fond statique puis ne redessiner que la
+    # ligne et l'image — beaucoup plus rapide qu'un redraw complet
+    fig.canvas.restore_region(elements['fond_spectre'])
+    elements['ax_spectre'].draw_artist(elements['ligne'])
+    fig.canvas.blit(elements['ax_spectre'].bbox)
+
+    fig.canvas.restore_region(elements['fond_waterfall'])
+    elements['ax_waterfall'].draw_artist(elements['image'])
+    fig.canvas.blit(elements['ax_waterfall'].bbox)
+
+    # flush_events traite la boucle d'événements GUI sans le sleep de
+    # 1 ms obligatoire qu'impose plt.pause
+    fig.canvas.flush_events()
 
-def faire_defiler_waterfall(waterfall, nouvelle_ligne):
-    """Fait défiler le waterfall vers le bas et ajoute une nouvelle ligne en haut."""
-    waterfall[1:] = waterfall[:-1]
-    waterfall[0] = nouvelle_ligne
+
+def faire_defiler_waterfall(waterfall, nouvelle_ligne, tete):
+    """Ajoute une ligne au waterfall sans recopier tout le tableau.
+
+    Le waterfall est géré comme un buffer circulaire : on écrit la
+    nouvelle ligne à l'indice 'tete' (qui recule à chaque trame) au lieu
+    de décaler les ~160 Ko du tableau complet à chaque image.
+
+    Retourne le nouvel indice de tête.
+    """
+    tete = (tete - 1) % PROFONDEUR_WATERFALL
+    waterfall[tete] = nouvelle_ligne
+    return tete
+
+
+def vue_waterfall(waterfall, tete, sortie):
+    """Remet le buffer circulaire dans l'ordre d'affichage (tête en haut).
+
+    Écrit dans 'sortie' (préalloué) pour ne pas allouer un nouveau
+    tableau à chaque rafraîchissement.
+    """
+    if tete == 0:
+        return waterfall
+    np.concatenate([waterfall[tete:], waterfall[:tete]], out=sortie)
+    return sortie
 
 
 # ============================================================
@@ -330,11 +600,11 @@ def main():
     freq_centrale = FREQUENCE_DEFAUT
     try:
         reponse = connexion.recv(1024)
-        for i in range(len(reponse) - 10):
-            if reponse[i] == 0xFE and reponse[i+1] == 0xFE and reponse[i+4] == 0x03:
-                freq_centrale = decoder_frequence_bcd(reponse[i+5:i+10])
-                print(f"Fréquence: {freq_centrale:.3f} MHz")
-                break
+        # Détection du message et décodage BCD fusionnés en une passe
+        frequence = _chercher_frequence(np.frombuffer(reponse, dtype=np.uint8))
+        if not np.isnan(frequence):
+            freq_centrale = frequence
+            print(f"Fréquence: {freq_centrale:.3f} MHz")
     except:
         pass
     
@@ -342,59 +612,71 @@ def main():
     elements = creer_figure_avec_sliders(freq_centrale)
     
     # Initialiser les données
-    spectre_actuel = np.zeros(LARGEUR_SPECTRE)
-    waterfall_donnees = np.zeros((PROFONDEUR_WATERFALL, LARGEUR_SPECTRE))
-    buffer_reception = bytearray()
+    # uint8 : 8x moins d'octets que le float64 par défaut — les
+    # amplitudes sont des octets, imshow accepte l'uint8 directement
+    spectre_actuel = np.zeros(LARGEUR_SPECTRE, dtype=np.uint8)
+    waterfall_donnees = np.zeros((PROFONDEUR_WATERFALL, LARGEUR_SPECTRE),
+                                 dtype=np.uint8)
+    waterfall_affichage = np.empty_like(waterfall_donnees)
+    tete_waterfall = 0
     nombre_trames = 0
+
+    # Lancer la réception sur un thread séparé, relié par une file bornée
+    file_spectres = queue.Queue(maxsize=4)
+    arret = threading.Event()
+    thread_reception = threading.Thread(
+        target=boucle_reception,
+        args=(connexion, file_spectres, arret),
+        daemon=True)
+    thread_reception.start()
+
+    # Cadence d'affichage découplée du débit réseau : la radio peut
+    # envoyer plus de trames que matplotlib ne peut en dessiner
+    INTERVALLE_AFFICHAGE = 1 / 30
+    dernier_affichage = 0.0
+    affichage_en_attente = False
     
     print("\n Utilisez les sliders pour ajuster le gain affiché")
     print(" Fermez la fenêtre pour arrêter.\n")
     
-    # --- Boucle principale ---
+    # --- Boucle principale (affichage seul, la réception est sur le thread) ---
     try:
-        connexion.settimeout(0.1)
-        
         while plt.fignum_exists(elements['fig'].number):
-            
-            # Recevoir des données
+
+            # Récupérer tous les spectres en attente dans la file
             try:
-                donnees_recues = connexion.recv(4096)
-                buffer_reception.extend(donnees_recues)
-            except socket.timeout:
+                while True:
+                    spectre_actuel = file_spectres.get_nowait()
+                    tete_waterfall = faire_defiler_waterfall(
+                        waterfall_donnees, spectre_actuel, tete_waterfall)
+                    affichage_en_attente = True
+
+                    nombre_trames += 1
+                    if nombre_trames % 50 == 0:
+                        print(f"   {nombre_trames} trames | Gain: {elements['gain_min']:.0f} - {elements['gain_max']:.0f}")
+            except queue.Empty:
                 pass
-            except Exception as erreur:
-                print(f"Erreur de réception: {erreur}")
-                break
-            
-            # Extraire les messages CI-V
-            messages = trouver_messages_civ(buffer_reception)
-            
-            # Traiter chaque message
-            for message in messages:
-                if len(message) < 5:
-                    continue
-                
-                commande = message[4]
-                
-                # Message de spectre
-                if commande == 0x27 and len(message) > 50:
-                    amplitudes = extraire_donnees_spectre(message)
-                    
-                    if amplitudes is not None:
-                        spectre_actuel = redimensionner_spectre(amplitudes, LARGEUR_SPECTRE)
-                        faire_defiler_waterfall(waterfall_donnees, spectre_actuel)
-                        mettre_a_jour_affichage(elements, spectre_actuel, waterfall_donnees)
-                        
-                        nombre_trames += 1
-                        if nombre_trames % 50 == 0:
-                            print(f"   {nombre_trames} trames | Gain: {elements['gain_min']:.0f} - {elements['gain_max']:.0f}")
-            
-            # Limiter la taille du buffer
-            if len(buffer_reception) > 10000:
-                buffer_reception.clear()
-    
+
+            # Redessiner au plus 30 fois par seconde : les données sont
+            # accumulées à chaque trame, l'affichage montre la dernière
+            maintenant = time.monotonic()
+            if affichage_en_attente and maintenant - dernier_affichage >= INTERVALLE_AFFICHAGE:
+                mettre_a_jour_affichage(
+                    elements, spectre_actuel,
+                    vue_waterfall(waterfall_donnees, tete_waterfall,
+                                  waterfall_affichage))
+                dernier_affichage = maintenant
+                affichage_en_attente = False
+            else:
+                # Laisser la main à la boucle d'événements GUI
+                plt.pause(0.01)
+
     except KeyboardInterrupt:
         print("\n\n Arrêt demandé par l'utilisateur")
+
+    # Arrêter proprement le thread de réception
+    arret.set()
+    thread_reception.join(timeout=1)
     
     # --- Nettoyage ---
     print("\n Nettoyage en cours...")
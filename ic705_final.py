@@ -25,7 +25,13 @@ from matplotlib.colors import LinearSegmentedColormap
 from collections import deque
 from dataclasses import dataclass
 from typing import Optional
-import queue
+
+# Scanner de trames compilé (optionnel) : repli sur le parseur Python
+# si Numba n'est pas installé
+try:
+    from ic705_numba import find_messages as _find_messages_njit
+except ImportError:
+    _find_messages_njit = None
 
 # ============== CONFIGURATION ==============
 @dataclass
@@ -38,7 +44,7 @@ class Config:
     WATERFALL_DEPTH: int = 150
     SOCKET_TIMEOUT: float = 0.1
     UPDATE_INTERVAL: int = 30  # ms entre mises à jour affichage
-    FREQ_UPDATE_FRAMES: int = 10  # Demande de fréquence toutes les N trames
+    FREQ_POLL_INTERVAL: float = 1.0  # s entre deux lectures de fréquence
     RADIO_ADDR: int = 0xA4  # IC-705
     CTRL_ADDR: int = 0xE0
 
@@ -62,116 +68,183 @@ WFVIEW_CMAP = LinearSegmentedColormap.from_list('wfview', WFVIEW_COLORS, N=256)
 
 
 # ============== PROTOCOLE CI-V ==============
+# Poids de chaque nibble BCD (little-endian : 2 chiffres décimaux par
+# octet), précalculés une fois — les 5 octets sont décodés en parallèle
+_POW10_LO = np.array([1, 100, 10_000, 1_000_000, 100_000_000], dtype=np.uint64)
+_POW10_HI = _POW10_LO * 10
+
+# Table d'encodage : valeur décimale 0-99 -> octet BCD packé
+_BCD_PACK = bytes((d % 10) | ((d // 10) << 4) for d in range(100))
+
+
 class CIVProtocol:
     """Gestion optimisée du protocole CI-V"""
     
-    __slots__ = ('radio_addr', 'ctrl_addr', '_buffer', '_freq_cache')
-    
+    __slots__ = ('radio_addr', 'ctrl_addr', '_buffer', '_freq_cache',
+                 '_cmd_read_freq', '_cmd_stream_on', '_cmd_stream_off')
+
     def __init__(self, radio_addr: int = 0xA4, ctrl_addr: int = 0xE0):
         self.radio_addr = radio_addr
         self.ctrl_addr = ctrl_addr
         self._buffer = bytearray(4096)  # Buffer pré-alloué
         self._freq_cache = 0.0
+        # Trames de commande fixes, construites une seule fois :
+        # zéro allocation sur le chemin chaud (lecture fréquence périodique)
+        self._cmd_read_freq = bytes([0xFE, 0xFE, radio_addr, ctrl_addr, 0x03, 0xFD])
+        self._cmd_stream_on = bytes([0xFE, 0xFE, radio_addr, ctrl_addr,
+                                     0x1A, 0x05, 0x00, 0x01, 0xFD])
+        self._cmd_stream_off = bytes([0xFE, 0xFE, radio_addr, ctrl_addr,
+                                      0x1A, 0x05, 0x00, 0x00, 0xFD])
     
     @staticmethod
     def decode_bcd_frequency(freq_bytes: bytes) -> float:
-        """Décode BCD little-endian vers MHz (optimisé)"""
-        freq = 0
-        multiplier = 1
-        for byte in freq_bytes:
-            freq += (byte & 0x0F) * multiplier
-            multiplier *= 10
-            freq += ((byte >> 4) & 0x0F) * multiplier
-            multiplier *= 10
-        return freq / 1_000_000.0
+        """Décode BCD little-endian vers MHz (nibbles extraits en parallèle)"""
+        # Un masque et un décalage vectorisés remplacent la boucle
+        # Python (~15 opérations interprétées par octet)
+        octets = np.frombuffer(freq_bytes, dtype=np.uint8, count=5).astype(np.uint64)
+        lo = octets & 0x0F
+        hi = octets >> 4
+        freq_hz = int((lo * _POW10_LO).sum() + (hi * _POW10_HI).sum())
+        return freq_hz / 1_000_000.0
     
     @staticmethod
     def encode_bcd_frequency(freq_mhz: float) -> bytes:
         """Encode MHz vers BCD little-endian (5 bytes)"""
         freq_hz = int(freq_mhz * 1_000_000)
-        bcd = bytearray(5)
-        for i in range(5):
-            bcd[i] = (freq_hz % 10) | ((freq_hz // 10 % 10) << 4)
-            freq_hz //= 100
-        return bytes(bcd)
+        # Un lookup par paire de chiffres au lieu des chaînes %/// de la
+        # boucle : la table _BCD_PACK fournit l'octet packé directement
+        return bytes((
+            _BCD_PACK[freq_hz % 100],
+            _BCD_PACK[freq_hz // 100 % 100],
+            _BCD_PACK[freq_hz // 10_000 % 100],
+            _BCD_PACK[freq_hz // 1_000_000 % 100],
+            _BCD_PACK[freq_hz // 100_000_000 % 100],
+        ))
     
     def cmd_read_freq(self) -> bytes:
         """Commande lecture fréquence"""
-        return bytes([0xFE, 0xFE, self.radio_addr, self.ctrl_addr, 0x03, 0xFD])
-    
+        return self._cmd_read_freq
+
     def cmd_set_freq(self, freq_mhz: float) -> bytes:
         """Commande changement fréquence"""
         bcd = self.encode_bcd_frequency(freq_mhz)
         return bytes([0xFE, 0xFE, self.radio_addr, self.ctrl_addr, 0x05]) + bcd + bytes([0xFD])
-    
+
     def cmd_streaming_on(self) -> bytes:
         """Commande activation streaming"""
-        return bytes([0xFE, 0xFE, self.radio_addr, self.ctrl_addr, 0x1A, 0x05, 0x00, 0x01, 0xFD])
-    
+        return self._cmd_stream_on
+
     def cmd_streaming_off(self) -> bytes:
         """Commande désactivation streaming"""
-        return bytes([0xFE, 0xFE, self.radio_addr, self.ctrl_addr, 0x1A, 0x05, 0x00, 0x00, 0xFD])
+        return self._cmd_stream_off
 
 
 # ============== RÉCEPTEUR CI-V (THREAD) ==============
 class CIVReceiver(threading.Thread):
     """Thread de réception des données CI-V"""
     
-    def __init__(self, sock: socket.socket, spectrum_queue: queue.Queue, 
+    def __init__(self, sock: socket.socket, spectrum_callback,
                  freq_callback, config: Config):
         super().__init__(daemon=True)
         self.sock = sock
-        self.spectrum_queue = spectrum_queue
+        self.spectrum_callback = spectrum_callback
         self.freq_callback = freq_callback
         self.config = config
         self.protocol = CIVProtocol(config.RADIO_ADDR, config.CTRL_ADDR)
         self.running = True
         self._buffer = bytearray()
+        self._read_pos = 0  # Curseur de lecture dans le buffer
         self._frame_count = 0
-        
-        # Buffer numpy pré-alloué pour les données de spectre
-        self._spectrum_buffer = np.zeros(config.NUM_POINTS, dtype=np.float32)
-        # Indices pré-calculés pour le sous-échantillonnage
-        self._resample_indices = None
+        # Tampon de réception pré-alloué : recv_into écrit dedans
+        # directement, sans allouer un bytes neuf à chaque recv
+        self._recv_buf = bytearray(65536)
+        self._recv_mv = memoryview(self._recv_buf)
+        
+        # Deux buffers de spectre pré-alloués, utilisés en alternance :
+        # le consommateur peut encore lire l'ancien pendant que le
+        # thread remplit le nouveau (pas besoin de .copy() par trame)
+        self._spectrum_buffers = (np.zeros(config.NUM_POINTS, dtype=np.float32),
+                                  np.zeros(config.NUM_POINTS, dtype=np.float32))
+        self._buf_index = 0
+        # Bornes de moyennage en cache, par longueur brute : la radio
+        # émet des trames de longueur fixe, le calcul n'a lieu qu'une
+        # fois par session
+        self._resample_cache = {}
     
     def stop(self):
         """Arrête le thread"""
         self.running = False
     
     def _parse_messages(self):
-        """Parse les messages CI-V du buffer (optimisé)"""
+        """Parse les messages CI-V du buffer (curseur de lecture amorti)
+
+        Retourne des memoryview sur un instantané bytes du buffer : une
+        seule copie par passe de parsing au lieu d'une par message. Les
+        vues restent valides après compactage (l'instantané est immuable)
+        mais doivent être consommées avant la passe suivante.
+        """
+        if _find_messages_njit is not None:
+            return self._parse_messages_njit()
+
         messages = []
-        
+        buf = self._buffer
+        pos = self._read_pos
+        snapshot = memoryview(bytes(buf))
+
         while True:
-            # Chercher le début d'un message
-            try:
-                start = self._buffer.index(0xFE)
-                if start > 0:
-                    del self._buffer[:start]
-                    start = 0
-            except ValueError:
-                self._buffer.clear()
+            # Chercher le préambule FE FE en un seul memmem C-level
+            # (plus de détection en deux temps « FE puis vérifier FE »)
+            start = buf.find(b'\xFE\xFE', pos)
+            if start < 0:
+                # Tout est consommé, sauf un éventuel FE final qui
+                # pourrait être le début du prochain préambule
+                pos = max(pos, len(buf) - 1)
                 break
-            
-            # Vérifier qu'on a FE FE
-            if len(self._buffer) < 2:
-                break
-            if self._buffer[1] != 0xFE:
-                del self._buffer[:1]
-                continue
-            
+
             # Chercher la fin du message
-            try:
-                end = self._buffer.index(0xFD, 2) + 1
-                messages.append(bytes(self._buffer[:end]))
-                del self._buffer[:end]
-            except ValueError:
-                # Message incomplet
-                if len(self._buffer) > 1000:
+            end = buf.find(0xFD, start + 2)
+            if end < 0:
+                # Message incomplet : garder la fin du buffer
+                pos = start
+                if len(buf) - start > 1000:
                     # Buffer trop grand, nettoyer
-                    self._buffer.clear()
+                    buf.clear()
+                    pos = 0
                 break
-        
+
+            messages.append(snapshot[start:end + 1])
+            pos = end + 1
+
+        self._read_pos = pos
+        # Compacter seulement quand le préfixe consommé devient grand :
+        # un seul memmove amorti au lieu d'un del O(N) par message
+        if self._read_pos > 4096:
+            del buf[:self._read_pos]
+            self._read_pos = 0
+
+        return messages
+
+    def _parse_messages_njit(self):
+        """Variante du parseur utilisant le scanner natif Numba"""
+        buf = self._buffer
+        # Instantané immuable : les vues retournées restent valides
+        # après compactage du bytearray, et frombuffer sur bytes ne
+        # bloque pas son redimensionnement
+        snapshot = memoryview(bytes(buf))
+        arr = np.frombuffer(snapshot, dtype=np.uint8)
+        starts, ends, pos = _find_messages_njit(arr, self._read_pos)
+
+        messages = [snapshot[s:e] for s, e in zip(starts, ends)]
+
+        self._read_pos = pos
+        if len(buf) - pos > 1000 and not ends:
+            # Trame incomplète anormalement longue : purger
+            buf.clear()
+            self._read_pos = 0
+        elif self._read_pos > 4096:
+            del buf[:self._read_pos]
+            self._read_pos = 0
+
         return messages
     
     def _extract_spectrum_data(self, msg: bytes) -> Optional[np.ndarray]:
@@ -187,39 +260,58 @@ class CIVReceiver(threading.Thread):
         if raw_len < 10:
             return None
         
-        # Créer un array numpy directement depuis les bytes
-        raw_data = np.frombuffer(msg[amp_start:amp_end], dtype=np.uint8).astype(np.float32)
-        
-        # Sous-échantillonnage optimisé
+        # Vue numpy zéro-copie sur la charge utile (pas de slice bytes,
+        # pas de .astype intermédiaire)
+        raw_data = np.frombuffer(memoryview(msg)[amp_start:amp_end], dtype=np.uint8)
+
+        # Alterner les deux buffers pré-alloués
+        self._buf_index ^= 1
+        out = self._spectrum_buffers[self._buf_index]
+
+        # Sous-échantillonnage optimisé : moyenne par blocs plutôt que
+        # gather au plus proche voisin — accès mémoire séquentiels, et
+        # aucune information de sous-bin perdue (anti-repliement)
         if raw_len >= self.config.NUM_POINTS:
-            # Calculer les indices une seule fois si la taille est constante
-            if self._resample_indices is None or len(self._resample_indices) != self.config.NUM_POINTS:
-                self._resample_indices = np.linspace(0, raw_len - 1, 
-                                                      self.config.NUM_POINTS, dtype=np.int32)
-            np.take(raw_data, self._resample_indices, out=self._spectrum_buffer)
-            return self._spectrum_buffer.copy()
+            cache = self._resample_cache.get(raw_len)
+            if cache is None:
+                edges = np.linspace(0, raw_len, self.config.NUM_POINTS + 1,
+                                    dtype=np.int64)
+                cache = (edges[:-1], np.diff(edges).astype(np.float32))
+                self._resample_cache[raw_len] = cache
+            starts, widths = cache
+            np.add.reduceat(raw_data, starts, dtype=np.float32, out=out)
+            out /= widths
         else:
-            result = np.zeros(self.config.NUM_POINTS, dtype=np.float32)
-            result[:raw_len] = raw_data
-            return result
+            out[:] = 0
+            out[:raw_len] = raw_data
+        return out
     
     def run(self):
         """Boucle principale de réception"""
         self.sock.setblocking(False)
         
         while self.running:
-            # Utiliser select pour attendre les données (non-bloquant)
-            ready, _, _ = select.select([self.sock], [], [], 0.05)
-            
+            # Utiliser select pour attendre les données (non-bloquant).
+            # Timeout long : les réveils à vide ne servent qu'à vérifier
+            # self.running, inutile de les multiplier
+            ready, _, _ = select.select([self.sock], [], [], 0.25)
+
             if not ready:
                 continue
-            
+
+            # Drainer le buffer kernel : enchaîner les recv_into jusqu'à
+            # EAGAIN au lieu de repasser par select après chaque recv
+            # (zéro allocation : le tampon pré-alloué est réutilisé)
             try:
-                data = self.sock.recv(4096)
-                if not data:
-                    continue
-                self._buffer.extend(data)
-            except (socket.error, BlockingIOError):
+                while True:
+                    n = self.sock.recv_into(self._recv_mv)
+                    if n == 0:
+                        break
+                    self._buffer.extend(self._recv_mv[:n])
+            except (BlockingIOError, socket.error):
+                pass
+
+            if not self._buffer:
                 continue
             
             # Parser les messages
@@ -241,17 +333,9 @@ class CIVReceiver(threading.Thread):
                 elif cmd == 0x27 and len(msg) > 100:
                     spectrum = self._extract_spectrum_data(msg)
                     if spectrum is not None:
-                        # Ne pas bloquer si la queue est pleine
-                        try:
-                            self.spectrum_queue.put_nowait(spectrum)
-                        except queue.Full:
-                            # Retirer l'ancien et mettre le nouveau
-                            try:
-                                self.spectrum_queue.get_nowait()
-                                self.spectrum_queue.put_nowait(spectrum)
-                            except queue.Empty:
-                                pass
-                        
+                        # Dépôt « dernière trame gagne » : simple échange
+                        # de référence, jamais bloquant
+                        self.spectrum_callback(spectrum)
                         self._frame_count += 1
 
 
@@ -264,24 +348,29 @@ class SpectrumDisplay:
         self.center_freq_mhz = 145.000
         self._last_freq = 145.000
         
-        # Données pré-allouées
-        self.freq_axis = np.linspace(
-            self.center_freq_mhz - config.SPAN_KHZ/2000,
-            self.center_freq_mhz + config.SPAN_KHZ/2000,
-            config.NUM_POINTS
-        )
+        # Axe relatif calculé une seule fois (le span ne change pas) :
+        # l'axe absolu n'est plus qu'une addition scalaire à chaque tune
+        self._rel_axis = np.linspace(-config.SPAN_KHZ/2000,
+                                     config.SPAN_KHZ/2000,
+                                     config.NUM_POINTS)
+        self.freq_axis = self._rel_axis + self.center_freq_mhz
         self.spectrum_data = np.zeros(config.NUM_POINTS, dtype=np.float32)
         
         # Waterfall pré-alloué (contiguous memory)
-        self.waterfall_data = np.zeros((config.WATERFALL_DEPTH, config.NUM_POINTS), 
+        # Buffer circulaire à fenêtre dupliquée : 2x la profondeur, chaque
+        # ligne écrite deux fois (à head et head+depth). La tranche
+        # contiguë [head:head+depth] est alors toujours dans l'ordre
+        # d'affichage — une vue zéro-copie, sans np.roll
+        self.waterfall_data = np.zeros((2 * config.WATERFALL_DEPTH, config.NUM_POINTS),
                                         dtype=np.float32, order='C')
-        self._waterfall_idx = 0
+        self._wf_head = 0  # Indice d'écriture du buffer circulaire
         
         # Créer la figure
         self._setup_figure()
         
-        # Variables pour le blitting
-        self._background = None
+        # Variables pour le blitting : fonds statiques des deux axes
+        self._bg_spectrum = None
+        self._bg_waterfall = None
         self._needs_full_redraw = True
     
     def _setup_figure(self):
@@ -292,8 +381,10 @@ class SpectrumDisplay:
         self.fig.patch.set_facecolor('#0a0a0a')
         
         # === Spectre ===
-        self.line, = self.ax1.plot(self.freq_axis, self.spectrum_data, 
-                                    color='#FFFF00', linewidth=1)
+        # animated=True : artistes exclus des redraws complets,
+        # redessinés uniquement par blitting dans update_display
+        self.line, = self.ax1.plot(self.freq_axis, self.spectrum_data,
+                                    color='#FFFF00', linewidth=1, animated=True)
         # Ligne verticale pour la fréquence centrale
         self.center_line = self.ax1.axvline(x=self.center_freq_mhz, color="#44FF0095", 
                                              linewidth=1.5, linestyle='--', alpha=0.8)
@@ -309,13 +400,14 @@ class SpectrumDisplay:
         
         # === Waterfall ===
         self.waterfall_img = self.ax2.imshow(
-            self.waterfall_data, 
+            self.waterfall_data[:self.config.WATERFALL_DEPTH],
             aspect='auto', 
             cmap=WFVIEW_CMAP,
             extent=[self.freq_axis[0], self.freq_axis[-1], self.config.WATERFALL_DEPTH, 0],
             vmin=0, vmax=200,
             interpolation='bilinear',
-            origin='upper'
+            origin='upper',
+            animated=True
         )
         self.ax2.set_xlabel('Fréquence (MHz)', fontsize=10)
         self.ax2.set_ylabel('Temps', fontsize=10)
@@ -353,7 +445,13 @@ class SpectrumDisplay:
         self.btn_apply.on_clicked(self._on_apply_click)
         
         plt.tight_layout(rect=[0, 0.08, 1, 1])
-    
+
+        # Un redimensionnement de la fenêtre périme les fonds capturés :
+        # forcer leur recapture au prochain update_display
+        self.fig.canvas.mpl_connect(
+            'resize_event',
+            lambda event: setattr(self, '_needs_full_redraw', True))
+
     def _on_freq_submit(self, text):
         """Callback soumission fréquence"""
         try:
@@ -376,13 +474,12 @@ class SpectrumDisplay:
         if not plt.fignum_exists(self.fig.number):
             return False
         
-        # Mettre à jour les données du spectre
-        self.spectrum_data[:] = spectrum
-        
-        # Mettre à jour le waterfall (scroll optimisé)
-        # Déplacer les lignes vers le bas et ajouter la nouvelle en haut
-        self.waterfall_data[1:] = self.waterfall_data[:-1]
-        self.waterfall_data[0] = spectrum
+        # Mettre à jour le waterfall : deux écritures de ligne (fenêtre
+        # dupliquée) au lieu de décaler ~120 Ko à chaque trame
+        depth = self.config.WATERFALL_DEPTH
+        self._wf_head = (self._wf_head - 1) % depth
+        self.waterfall_data[self._wf_head] = spectrum
+        self.waterfall_data[self._wf_head + depth] = spectrum
         
         # Vérifier si la fréquence a changé
         if abs(self.center_freq_mhz - self._last_freq) > 0.0001:
@@ -391,22 +488,43 @@ class SpectrumDisplay:
             self._needs_full_redraw = True
         
         # Mise à jour graphique
-        self.line.set_ydata(self.spectrum_data)
-        self.waterfall_img.set_data(self.waterfall_data)
-        
-        # Redraw complet pour éviter les artefacts de superposition
-        self.fig.canvas.draw_idle()
-        self.fig.canvas.flush_events()
+        # Passer le tableau du récepteur directement à la ligne : la
+        # recopie intermédiaire dans self.spectrum_data était redondante
+        # (le double-buffer du récepteur garantit sa stabilité)
+        self.line.set_ydata(spectrum)
+        # Tranche contiguë déjà dans l'ordre d'affichage : vue zéro-copie
+        self.waterfall_img.set_data(
+            self.waterfall_data[self._wf_head:self._wf_head + depth])
+
+        canvas = self.fig.canvas
+
+        # Redraw complet uniquement quand les axes ont changé (fréquence,
+        # redimensionnement) : on recapture alors les fonds statiques
+        if self._needs_full_redraw or self._bg_spectrum is None:
+            canvas.draw()
+            self._bg_spectrum = canvas.copy_from_bbox(self.ax1.bbox)
+            self._bg_waterfall = canvas.copy_from_bbox(self.ax2.bbox)
+            self._needs_full_redraw = False
+
+        # Blitting : restaurer les fonds puis ne redessiner que les deux
+        # artistes qui changent à chaque trame
+        canvas.restore_region(self._bg_spectrum)
+        self.ax1.draw_artist(self.line)
+        canvas.blit(self.ax1.bbox)
+
+        canvas.restore_region(self._bg_waterfall)
+        self.ax2.draw_artist(self.waterfall_img)
+        canvas.blit(self.ax2.bbox)
+
+        canvas.flush_events()
         return True
     
     def _update_freq_axis(self):
         """Met à jour l'axe des fréquences"""
-        self.freq_axis = np.linspace(
-            self.center_freq_mhz - self.config.SPAN_KHZ/2000,
-            self.center_freq_mhz + self.config.SPAN_KHZ/2000,
-            self.config.NUM_POINTS
-        )
-        
+        # Axe relatif précalculé + décalage scalaire : pas de linspace
+        self.freq_axis = self._rel_axis + self.center_freq_mhz
+
+
         self.line.set_xdata(self.freq_axis)
         self.center_line.set_xdata([self.center_freq_mhz, self.center_freq_mhz])  # Mise à jour ligne centrale
         self.ax1.set_xlim(self.freq_axis[0], self.freq_axis[-1])
@@ -445,15 +563,26 @@ class IC705SpectrumApp:
         self.sock = None
         self.receiver = None
         self.display = None
-        self.spectrum_queue = queue.Queue(maxsize=5)
+        # Emplacement unique « dernière trame gagne » : un échange de
+        # référence atomique + un Event remplacent queue.Queue et ses
+        # deux prises de verrou par trame
+        self._latest_spectrum = None
+        self._new_spectrum = threading.Event()
         self._running = False
-        self._freq_lock = threading.Lock()
+        # Pas de verrou sur la fréquence : l'affectation d'un float à un
+        # attribut est atomique sous le GIL, inutile de payer un mutex
+        # à chaque message du thread de réception
         self._current_freq = 145.000
-    
+        self._next_freq_poll = 0.0  # Échéance du prochain poll fréquence
+
     def _freq_callback(self, freq: float):
         """Callback appelé quand une fréquence est reçue"""
-        with self._freq_lock:
-            self._current_freq = freq
+        self._current_freq = freq
+
+    def _spectrum_callback(self, spectrum: np.ndarray):
+        """Callback appelé quand un spectre est reçu (thread récepteur)"""
+        self._latest_spectrum = spectrum
+        self._new_spectrum.set()
     
     def connect(self) -> bool:
         """Connexion au serveur CI-V"""
@@ -478,16 +607,22 @@ class IC705SpectrumApp:
             try:
                 data = self.sock.recv(256)
                 buffer.extend(data)
-                
-                # Chercher une réponse de fréquence
-                for i in range(len(buffer) - 10):
-                    if (buffer[i] == 0xFE and buffer[i+1] == 0xFE and 
-                        buffer[i+4] == 0x03 and buffer[i+10] == 0xFD):
-                        freq = self.protocol.decode_bcd_frequency(buffer[i+5:i+10])
+
+                # Chercher une réponse de fréquence : deux find C-level
+                # par candidat au lieu d'un scan Python octet par octet
+                pos = 0
+                while True:
+                    start = buffer.find(b'\xFE\xFE', pos)
+                    if start < 0 or start + 10 >= len(buffer):
+                        break
+                    if buffer[start + 4] == 0x03 and buffer[start + 10] == 0xFD:
+                        freq = self.protocol.decode_bcd_frequency(
+                            buffer[start + 5:start + 10])
                         if freq > 0:
                             self._current_freq = freq
                             print(f"✅ Fréquence initiale: {freq:.6f} MHz")
                             return freq
+                    pos = start + 2
             except socket.timeout:
                 break
         
@@ -530,8 +665,8 @@ class IC705SpectrumApp:
             
             # Démarrer le thread de réception
             self.receiver = CIVReceiver(
-                self.sock, 
-                self.spectrum_queue, 
+                self.sock,
+                self._spectrum_callback,
                 self._freq_callback,
                 self.config
             )
@@ -551,39 +686,41 @@ class IC705SpectrumApp:
                     freq = self.display.pending_freq
                     self.display.pending_freq = None
                     self.sock.send(self.protocol.cmd_set_freq(freq))
-                    with self._freq_lock:
-                        self._current_freq = freq
+                    self._current_freq = freq
                     print(f"→ Fréquence changée: {freq:.6f} MHz")
                 
-                # Demander la fréquence périodiquement
-                if frame_count % self.config.FREQ_UPDATE_FRAMES == 0:
+                # Demander la fréquence périodiquement, à l'horloge murale :
+                # la cadence de polling ne dépend plus du FPS d'affichage
+                now = time.monotonic()
+                if now >= self._next_freq_poll:
+                    self._next_freq_poll = now + self.config.FREQ_POLL_INTERVAL
                     try:
                         self.sock.send(self.protocol.cmd_read_freq())
                     except:
                         pass
                 
-                # Récupérer et afficher les données de spectre
-                try:
-                    spectrum = self.spectrum_queue.get(timeout=0.1)
-                    
-                    # Mettre à jour la fréquence
-                    with self._freq_lock:
-                        self.display.update_frequency(self._current_freq)
-                    
+                # Récupérer et afficher la trame la plus récente
+                if self._new_spectrum.wait(timeout=0.1):
+                    self._new_spectrum.clear()
+                    spectrum = self._latest_spectrum
+
+                    # Mettre à jour la fréquence (lecture atomique)
+                    self.display.update_frequency(self._current_freq)
+
                     # Mettre à jour l'affichage
                     if not self.display.update_display(spectrum):
                         break
-                    
+
                     frame_count += 1
-                    
+
                     # Stats toutes les 100 trames
                     if frame_count % 100 == 0:
                         now = time.time()
                         fps = 100 / (now - last_time)
                         print(f"  {frame_count} trames | {fps:.1f} FPS")
                         last_time = now
-                        
-                except queue.Empty:
+
+                else:
                     # Pas de données, juste traiter les événements
                     self.display.fig.canvas.flush_events()
             
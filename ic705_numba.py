@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Scanner de trames CI-V compilé avec Numba
+=========================================
+Fournit find_messages(), le scan du framing FE FE ... FD compilé en
+code natif par Numba (la boucle octet par octet passe de bytecode
+interprété à une boucle LLVM, typiquement ~50x plus rapide).
+
+Ce module est optionnel : si Numba n'est pas installé, son import
+échoue et l'appelant retombe sur son parseur Python.
+
+Il tient lieu d'extension compilée (Cython/C) pour le projet : même
+boucle C serrée sans PyObject dans le scan, mais sans chaîne de
+compilation à maintenir — njit(cache=True) garde le binaire sur disque
+après la première exécution, donc le coût du JIT n'est payé qu'une
+fois par machine.
+"""
+
+import numpy as np
+from numba import njit, types
+
+# Les trames arrivent en bytes : frombuffer produit des tableaux en
+# lecture seule, les signatures doivent le déclarer sous peine de
+# « No matching definition » au premier appel
+_uint8_ro = types.Array(types.uint8, 1, 'C', readonly=True)
+
+
+@njit(cache=True)
+def find_messages(buf, start_pos):
+    """Scanne buf (uint8[:]) à partir de start_pos.
+
+    Retourne (starts, ends, new_pos) : les bornes [debut, fin) de
+    chaque trame CI-V complète trouvée, et la position où reprendre le
+    scan au prochain appel (début d'une trame incomplète le cas
+    échéant).
+    """
+    n = buf.shape[0]
+    starts = []
+    ends = []
+    i = start_pos
+    while i + 1 < n:
+        if buf[i] == 0xFE and buf[i + 1] == 0xFE:
+            j = i + 2
+            while j < n and buf[j] != 0xFD:
+                j += 1
+            if j >= n:
+                break  # Trame incomplète : reprendre ici au prochain appel
+            starts.append(i)
+            ends.append(j + 1)
+            i = j + 1
+        else:
+            i += 1
+    return starts, ends, i
+
+
+# Signature explicite : la compilation a lieu à l'import du module,
+# pas au premier appel — aucune pause JIT sur la première trame reçue
+@njit(types.void(_uint8_ro, types.uint8[::1], types.uint8[::1], types.int64),
+      cache=True)
+def process_frame(raw, out_spectrum, waterfall_row, n_points):
+    """Sous-échantillonne raw (uint8[:]) vers out_spectrum et recopie le
+    résultat dans waterfall_row, en une seule passe fusionnée : pas de
+    tableau intermédiaire entre l'extraction et l'écriture des deux
+    sorties.
+    """
+    n = raw.shape[0]
+    if n >= n_points:
+        pas = (n - 1) / (n_points - 1)
+        for i in range(n_points):
+            v = raw[int(i * pas)]
+            out_spectrum[i] = v
+            waterfall_row[i] = v
+    else:
+        for i in range(n):
+            v = raw[i]
+            out_spectrum[i] = v
+            waterfall_row[i] = v
+        for i in range(n, n_points):
+            out_spectrum[i] = 0
+            waterfall_row[i] = 0
+
+
+@njit(types.float64(_uint8_ro), cache=True)
+def decode_bcd(octets):
+    """Décode 5 octets BCD little-endian (uint8[:]) en MHz (float64)."""
+    freq_hz = 0
+    poids = 1
+    for k in range(5):
+        freq_hz += (octets[k] & 0x0F) * poids
+        poids *= 10
+        freq_hz += (octets[k] >> 4) * poids
+        poids *= 10
+    return freq_hz / 1_000_000.0
+
+
+# find_messages renvoie des listes (type de retour inexprimable en
+# signature simple) : un appel d'amorçage sur un tampon vide déclenche
+# sa compilation ici, à l'import, plutôt qu'à la première trame reçue
+find_messages(np.zeros(2, dtype=np.uint8), 0)
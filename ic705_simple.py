@@ -9,11 +9,19 @@ Auteur: Étudiant PTUT
 Date: Décembre 2025
 """
 
+import selectors
 import socket
 import time
 import numpy as np
 import matplotlib.pyplot as plt
 
+# Accélération optionnelle : si Numba est installé, le scan des trames
+# tourne en code natif (module ic705_numba). Sinon on garde le Python.
+try:
+    from ic705_numba import find_messages as _find_messages_njit
+except ImportError:
+    _find_messages_njit = None
+
 # ============================================================
 #                    PARAMÈTRES DE CONFIGURATION
 # ============================================================
@@ -48,6 +56,11 @@ def connecter_au_serveur():
         
         # Se connecter au serveur
         connexion.connect((SERVEUR_IP, SERVEUR_PORT))
+
+        # Agrandir le buffer de réception du noyau : les trames de
+        # spectre arrivent en rafales de plusieurs ko
+        connexion.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 256 * 1024)
+
         print(f"Connecté au serveur {SERVEUR_IP}:{SERVEUR_PORT}")
         
         return connexion
@@ -138,21 +151,18 @@ def decoder_frequence_bcd(octets_frequence):
     Retourne:
         float: La fréquence en MHz
     """
-    frequence_hz = 0
-    multiplicateur = 1
-    
-    # Parcourir chaque octet
-    for octet in octets_frequence:
-        # Extraire le nibble bas (bits 0-3)
-        chiffre_bas = octet & 0x0F
-        frequence_hz += chiffre_bas * multiplicateur
-        multiplicateur *= 10
-        
-        # Extraire le nibble haut (bits 4-7)
-        chiffre_haut = (octet >> 4) & 0x0F
-        frequence_hz += chiffre_haut * multiplicateur
-        multiplicateur *= 10
-    
+    # La longueur est toujours de 5 octets : on déroule la boucle en une
+    # seule expression arithmétique (chaque nibble multiplié par son
+    # poids décimal), sans boucle Python ni multiplicateur incrémental
+    b0, b1, b2, b3, b4 = octets_frequence
+    frequence_hz = (
+        (b0 & 0x0F) + (b0 >> 4) * 10
+        + (b1 & 0x0F) * 100 + (b1 >> 4) * 1_000
+        + (b2 & 0x0F) * 10_000 + (b2 >> 4) * 100_000
+        + (b3 & 0x0F) * 1_000_000 + (b3 >> 4) * 10_000_000
+        + (b4 & 0x0F) * 100_000_000 + (b4 >> 4) * 1_000_000_000
+    )
+
     # Convertir Hz en MHz
     frequence_mhz = frequence_hz / 1_000_000
     return frequence_mhz
@@ -165,45 +175,57 @@ def trouver_messages_civ(buffer):
     Un message CI-V a la structure:
     FE FE [dest] [src] [cmd] [données...] FD
     
+    Plutôt qu'une boucle Python octet par octet, on scanne un
+    instantané du buffer avec find() (recherche en C) et on renvoie
+    des memoryview : des "fenêtres" sur l'instantané, sans recopier
+    chaque message. Le buffer n'est tronqué qu'une fois à la fin.
+
     Arguments:
         buffer: bytearray contenant les données reçues
-        
+
     Retourne:
-        liste: Liste des messages complets trouvés
+        liste: Liste des messages complets trouvés (memoryview)
     """
     messages = []
-    
+
+    # Instantané immuable du buffer : les memoryview pointent dedans,
+    # ce qui permet de vider le bytearray sans invalider les messages
+    instantane = bytes(buffer)
+    vue = memoryview(instantane)
+
+    # Chemin compilé : le scan FE FE ... FD tourne en code natif
+    if _find_messages_njit is not None:
+        tableau = np.frombuffer(instantane, dtype=np.uint8)
+        debuts, fins, pos = _find_messages_njit(tableau, 0)
+        for d, f in zip(debuts, fins):
+            messages.append(vue[d:f])
+        del buffer[:pos]
+        return messages
+
+    pos = 0
+
     while True:
-        # Chercher le début d'un message (FE FE)
-        try:
-            debut = buffer.index(0xFE)
-        except ValueError:
-            break  # Pas de FE trouvé
-        
-        # Supprimer les octets avant le début
-        if debut > 0:
-            del buffer[:debut]
-        
-        # Vérifier qu'on a bien FE FE (double préambule)
-        if len(buffer) < 2:
+        # Chercher le début d'un message (préambule FE FE)
+        debut = instantane.find(b'\xFE\xFE', pos)
+        if debut < 0:
+            # Garder le dernier octet : il peut être le premier FE
+            # d'un préambule coupé en deux par le recv
+            pos = max(pos, len(instantane) - 1)
             break
-        if buffer[1] != 0xFE:
-            del buffer[:1]  # Faux positif, continuer
-            continue
-        
+
         # Chercher la fin du message (FD)
-        try:
-            fin = buffer.index(0xFD, 2) + 1
-        except ValueError:
-            break  # Message incomplet, attendre plus de données
-        
-        # Extraire le message complet
-        message = bytes(buffer[:fin])
-        messages.append(message)
-        
-        # Supprimer le message du buffer
-        del buffer[:fin]
-    
+        fin = instantane.find(0xFD, debut + 2)
+        if fin < 0:
+            pos = debut  # Message incomplet, attendre plus de données
+            break
+
+        # Fenêtre sur le message complet (aucune copie)
+        messages.append(vue[debut:fin + 1])
+        pos = fin + 1
+
+    # Supprimer tout ce qui a été consommé, en une seule opération
+    del buffer[:pos]
+
     return messages
 
 
@@ -218,8 +240,8 @@ def extraire_donnees_spectre(message):
     - Octets 19+   : Données d'amplitude (jusqu'à FD)
     
     Arguments:
-        message: bytes du message CI-V complet
-        
+        message: bytes ou memoryview du message CI-V complet
+
     Retourne:
         numpy.array: Tableau des amplitudes, ou None si invalide
     """
@@ -233,32 +255,48 @@ def extraire_donnees_spectre(message):
     if len(donnees_brutes) < 10:
         return None
     
-    # Convertir en tableau numpy
-    amplitudes = np.array(list(donnees_brutes), dtype=float)
-    
+    # Convertir en tableau numpy (frombuffer lit les octets directement,
+    # sans passer par une liste Python intermédiaire)
+    amplitudes = np.frombuffer(donnees_brutes, dtype=np.uint8).astype(np.float32)
+
     return amplitudes
 
 
+# Cache des indices de sous-échantillonnage : la taille des trames est
+# quasi constante, inutile de recalculer le linspace à chaque trame
+_INDEX_CACHE = {}
+
+
 def redimensionner_spectre(amplitudes, taille_cible):
     """
     Redimensionne les données du spectre à la taille voulue.
-    
+
     L'IC-705 envoie environ 450 points, on les réduit à 200
     pour l'affichage en prenant des échantillons réguliers.
-    
+    Les indices ne dépendent que des deux tailles : ils sont
+    calculés une seule fois puis gardés dans _INDEX_CACHE.
+
     Arguments:
         amplitudes: Tableau numpy des amplitudes brutes
         taille_cible: Nombre de points souhaités
-        
+
     Retourne:
         numpy.array: Tableau redimensionné
     """
     taille_originale = len(amplitudes)
-    
+
     if taille_originale >= taille_cible:
         # Sous-échantillonnage: prendre des points régulièrement espacés
-        indices = np.linspace(0, taille_originale - 1, taille_cible, dtype=int)
-        return amplitudes[indices]
+        cle = (taille_originale, taille_cible)
+        indices = _INDEX_CACHE.get(cle)
+        if indices is None:
+            indices = np.linspace(0, taille_originale - 1, taille_cible, dtype=np.int32)
+            _INDEX_CACHE[cle] = indices
+        # np.take écrit directement dans le tableau de sortie et borne
+        # les indices en un seul appel C (pas de fancy-index Python)
+        resultat = np.empty(taille_cible, dtype=amplitudes.dtype)
+        np.take(amplitudes, indices, out=resultat, mode='clip')
+        return resultat
     else:
         # Données insuffisantes: compléter avec des zéros
         resultat = np.zeros(taille_cible)
@@ -276,9 +314,10 @@ def creer_figure(freq_centrale):
     
     Arguments:
         freq_centrale: Fréquence centrale en MHz
-    
+
     Retourne:
-        tuple: (figure, axe_spectre, axe_waterfall, ligne_spectre, image_waterfall, axe_freq)
+        tuple: (figure, axe_spectre, axe_waterfall, ligne_spectre,
+                image_waterfall, axe_freq, fonds, donnees_waterfall)
     """
     # Calculer l'axe des fréquences (centre ± span/2)
     demi_span = SPAN_KHZ / 2000  # Convertir kHz en MHz
@@ -306,8 +345,10 @@ def creer_figure(freq_centrale):
     # Ligne verticale rouge au centre (fréquence centrale)
     ax_spectre.axvline(x=freq_centrale, color='red', linestyle='--', alpha=0.7)
     
-    # Créer la ligne du spectre
-    ligne, = ax_spectre.plot(axe_freq, np.zeros(LARGEUR_SPECTRE), color='yellow', linewidth=1)
+    # Créer la ligne du spectre (animated=True : exclue du rendu
+    # complet, on la redessine nous-mêmes à chaque trame)
+    ligne, = ax_spectre.plot(axe_freq, np.zeros(LARGEUR_SPECTRE),
+                             color='yellow', linewidth=1, animated=True)
     
     # Configurer le waterfall
     ax_waterfall.set_title('Waterfall', color='white')
@@ -316,63 +357,115 @@ def creer_figure(freq_centrale):
     ax_waterfall.tick_params(colors='white')
     
     # Créer l'image du waterfall avec l'étendue en fréquence
-    donnees_vides = np.zeros((PROFONDEUR_WATERFALL, LARGEUR_SPECTRE))
+    # (uint8 : les amplitudes tiennent sur un octet, imshow le gère
+    # nativement avec vmin/vmax, et les copies sont 8x plus légères).
+    # Ce tableau est retourné à l'appelant : c'est lui qui sert de
+    # stockage du waterfall, inutile d'en allouer un deuxième dans main
+    donnees_waterfall = np.zeros((PROFONDEUR_WATERFALL, LARGEUR_SPECTRE), dtype=np.uint8)
     image = ax_waterfall.imshow(
-        donnees_vides,
+        donnees_waterfall,
         aspect='auto',
         cmap='viridis',
         vmin=0, vmax=200,
         origin='upper',
-        extent=[freq_min, freq_max, PROFONDEUR_WATERFALL, 0]
+        extent=[freq_min, freq_max, PROFONDEUR_WATERFALL, 0],
+        animated=True
     )
-    
+
     plt.tight_layout()
     plt.ion()
     plt.show()
-    
-    return fig, ax_spectre, ax_waterfall, ligne, image, axe_freq
+
+    # Dessiner une première fois puis mémoriser les "fonds" : tout ce
+    # qui ne bouge pas (axes, grille, titres). La boucle principale ne
+    # redessinera ensuite que la ligne et l'image par-dessus. Un dict
+    # pour pouvoir les invalider : un redimensionnement de la fenêtre
+    # les vide, la prochaine mise à jour les recapture à la bonne
+    # géométrie
+    fig.canvas.draw()
+    fonds = {'spectre': fig.canvas.copy_from_bbox(ax_spectre.bbox),
+             'waterfall': fig.canvas.copy_from_bbox(ax_waterfall.bbox)}
+    fig.canvas.mpl_connect('resize_event', lambda event: fonds.clear())
+
+    return (fig, ax_spectre, ax_waterfall, ligne, image, axe_freq, fonds,
+            donnees_waterfall)
 
 
-def mettre_a_jour_affichage(ligne, image, spectre, waterfall, axe_freq):
+def mettre_a_jour_affichage(fig, ax_spectre, ax_waterfall, ligne, image,
+                            spectre, waterfall, axe_freq, fonds):
     """
-    Met à jour l'affichage du spectre et du waterfall.
-    
+    Met à jour l'affichage du spectre et du waterfall (par "blitting").
+
+    Au lieu de redessiner toute la figure (axes, grille, titres...) à
+    chaque trame, on restaure les fonds mémorisés par creer_figure et
+    on ne redessine que les deux artistes qui changent.
+
     Arguments:
+        fig: La figure matplotlib
+        ax_spectre, ax_waterfall: Les deux axes
         ligne: Objet Line2D du spectre
         image: Objet AxesImage du waterfall
         spectre: Données du spectre (tableau 1D)
         waterfall: Données du waterfall (tableau 2D)
         axe_freq: Tableau des fréquences en MHz
+        fonds: Fonds capturés par creer_figure (copy_from_bbox),
+            vidés par le redimensionnement de la fenêtre
     """
+    # Recapturer les fonds s'ils ont été invalidés (redimensionnement)
+    if not fonds:
+        fig.canvas.draw()
+        fonds['spectre'] = fig.canvas.copy_from_bbox(ax_spectre.bbox)
+        fonds['waterfall'] = fig.canvas.copy_from_bbox(ax_waterfall.bbox)
+
+    # Restaurer les parties fixes de la figure
+    fig.canvas.restore_region(fonds['spectre'])
+    fig.canvas.restore_region(fonds['waterfall'])
+
     # Mettre à jour la ligne du spectre (fréquences en X, amplitudes en Y)
     ligne.set_data(axe_freq, spectre)
-    
+
     # Mettre à jour l'image du waterfall
     image.set_data(waterfall)
-    
-    # Rafraîchir l'affichage
-    plt.draw()
-    plt.pause(0.001)
+
+    # Ne redessiner que ces deux artistes, puis recopier à l'écran
+    ax_spectre.draw_artist(ligne)
+    ax_waterfall.draw_artist(image)
+    fig.canvas.blit(ax_spectre.bbox)
+    fig.canvas.blit(ax_waterfall.bbox)
+
+    # Traiter les événements de l'interface sans dormir : plt.pause
+    # imposait au moins 1 ms d'attente et un rendu complet par trame
+    fig.canvas.flush_events()
 
 
-def faire_defiler_waterfall(waterfall, nouvelle_ligne):
+def faire_defiler_waterfall(waterfall, nouvelle_ligne, tete):
     """
-    Fait défiler le waterfall vers le bas et ajoute une nouvelle ligne en haut.
-    
+    Ajoute une nouvelle ligne au waterfall (tampon circulaire).
+
     Le waterfall est comme un historique visuel:
     - Les nouvelles données arrivent en haut
     - Les anciennes données descendent
     - Les plus anciennes disparaissent en bas
-    
+
+    Plutôt que de recopier tout le tableau à chaque trame, on garde un
+    index "tête" qui indique où est la ligne la plus récente : on écrit
+    une seule ligne, et np.roll remet tout dans l'ordre à l'affichage.
+
     Arguments:
         waterfall: Tableau 2D du waterfall
         nouvelle_ligne: Données du spectre à ajouter en haut
+        tete: Index actuel de la ligne la plus récente
+
+    Retourne:
+        int: Le nouvel index de tête
     """
-    # Décaler toutes les lignes vers le bas (copie)
-    waterfall[1:] = waterfall[:-1]
-    
-    # Ajouter la nouvelle ligne en haut
-    waterfall[0] = nouvelle_ligne
+    # Reculer la tête d'une ligne (modulo = retour au début du tableau)
+    tete = (tete - 1) % PROFONDEUR_WATERFALL
+
+    # Écrire la nouvelle ligne à la position de tête
+    waterfall[tete] = nouvelle_ligne
+
+    return tete
 
 
 # ============================================================
@@ -393,7 +486,12 @@ def main():
     print("=" * 50)
     print("  IC-705 Spectrum Display - Version Simple")
     print("=" * 50)
-    
+
+    # Préchauffer le JIT Numba : la première compilation prend environ
+    # une seconde, autant la payer avant la première vraie trame
+    if _find_messages_njit is not None:
+        _find_messages_njit(np.zeros(8, dtype=np.uint8), 0)
+
     # --- Étape 1: Connexion ---
     connexion = connecter_au_serveur()
     if connexion is None:
@@ -418,11 +516,12 @@ def main():
         pass
     
     # --- Étape 3: Créer l'affichage ---
-    fig, ax_spectre, ax_waterfall, ligne, image, axe_freq = creer_figure(freq_centrale)
-    
-    # Initialiser les données
+    (fig, ax_spectre, ax_waterfall, ligne, image, axe_freq, fonds,
+     waterfall_donnees) = creer_figure(freq_centrale)
+
+    # Initialiser les données (le waterfall est celui de creer_figure)
     spectre_actuel = np.zeros(LARGEUR_SPECTRE)
-    waterfall_donnees = np.zeros((PROFONDEUR_WATERFALL, LARGEUR_SPECTRE))
+    tete_waterfall = 0  # Index de la ligne la plus récente (tampon circulaire)
     
     # Buffer pour recevoir les données
     buffer_reception = bytearray()
@@ -434,19 +533,25 @@ def main():
     
     # --- Étape 4: Boucle principale ---
     try:
-        connexion.settimeout(0.1)  # Timeout court pour ne pas bloquer
-        
+        # Socket non bloquant + selectors : on demande au système si des
+        # données sont prêtes au lieu de lever puis rattraper une
+        # exception socket.timeout à chaque tour de boucle
+        selecteur = selectors.DefaultSelector()
+        connexion.setblocking(False)
+        selecteur.register(connexion, selectors.EVENT_READ)
+
         while plt.fignum_exists(fig.number):  # Tant que la fenêtre est ouverte
-            
-            # Recevoir des données du serveur
-            try:
-                donnees_recues = connexion.recv(4096)
-                buffer_reception.extend(donnees_recues)
-            except socket.timeout:
-                pass  # Pas de données, ce n'est pas grave
-            except Exception as erreur:
-                print(f"Erreur de réception: {erreur}")
-                break
+
+            # Recevoir des données du serveur (seulement si prêtes)
+            if selecteur.select(timeout=0.005):
+                try:
+                    donnees_recues = connexion.recv(65536)
+                    buffer_reception.extend(donnees_recues)
+                except BlockingIOError:
+                    pass  # Fausse alerte, pas de données
+                except Exception as erreur:
+                    print(f"Erreur de réception: {erreur}")
+                    break
             
             # Extraire les messages CI-V du buffer
             messages = trouver_messages_civ(buffer_reception)
@@ -470,10 +575,16 @@ def main():
                         spectre_actuel = redimensionner_spectre(amplitudes, LARGEUR_SPECTRE)
                         
                         # Faire défiler le waterfall et ajouter la nouvelle ligne
-                        faire_defiler_waterfall(waterfall_donnees, spectre_actuel)
-                        
-                        # Mettre à jour l'affichage
-                        mettre_a_jour_affichage(ligne, image, spectre_actuel, waterfall_donnees, axe_freq)
+                        tete_waterfall = faire_defiler_waterfall(
+                            waterfall_donnees, spectre_actuel, tete_waterfall)
+
+                        # Mettre à jour l'affichage (np.roll remet le
+                        # tampon circulaire dans l'ordre chronologique)
+                        mettre_a_jour_affichage(
+                            fig, ax_spectre, ax_waterfall, ligne, image,
+                            spectre_actuel,
+                            np.roll(waterfall_donnees, -tete_waterfall, axis=0),
+                            axe_freq, fonds)
                         
                         nombre_trames += 1
                         
@@ -490,6 +601,7 @@ def main():
     
     # --- Étape 5: Nettoyage ---
     print("\n Nettoyage en cours...")
+    selecteur.close()
     desactiver_streaming(connexion)
     connexion.close()
     plt.close('all')
@@ -5,6 +5,7 @@ Animation fluide avec matplotlib.animation.FuncAnimation
 """
 
 import socket
+import threading
 import time
 import numpy as np
 import matplotlib.pyplot as plt
@@ -46,14 +47,39 @@ class IC705SpectrumDisplay:
         self.sock = None
         self.center_freq_mhz = 145.000
         self.last_freq = 145.000
-        self.waterfall_data = np.zeros((WATERFALL_DEPTH, NUM_POINTS))
+        # Waterfall stocké directement en RGBA uint8 : la colormap est
+        # appliquée ligne par ligne via une table de 256 entrées, ce qui
+        # évite à matplotlib de re-normaliser les 150x200 valeurs par
+        # frame. La table reproduit l'échelle vmin=0, vmax=200.
+        self._lut = (wfview_cmap(np.clip(np.arange(256) / 200.0, 0.0, 1.0))
+                     * 255).astype(np.uint8)
+        self.wf_rgba = np.empty((WATERFALL_DEPTH, NUM_POINTS, 4), dtype=np.uint8)
+        self.wf_rgba[:] = self._lut[0]
+        self.wf_head = 0  # Index de la ligne la plus récente (anneau)
         self.spectrum_data = np.zeros(NUM_POINTS)
         self.new_freq_to_set = None
         self.frame_count = 0
         self.running = True
+        self._applied_freq = None  # Dernière fréquence reflétée sur les axes
+        self._next_freq_poll = 0.0  # Prochaine interrogation de fréquence (monotonic)
         
         # Buffer pour les messages
         self.msg_buffer = bytearray()
+
+        # Spectres produits par le thread de réception et consommés par
+        # animate : maxlen=4 fait tomber les trames en retard au lieu
+        # d'accumuler de la latence quand l'affichage ne suit pas
+        self.spectra = deque(maxlen=4)
+        self.reader_thread = None
+
+        # Indices de sous-échantillonnage (dépendent seulement de la
+        # taille brute du spectre : calculés une fois, puis réutilisés)
+        self._indices = None
+        self._indices_len = 0
+
+        # Tampon de spectre préalloué, rempli sur place à chaque trame
+        # (pas d'allocation de 200 valeurs toutes les 30 ms)
+        self._spectrum_buf = np.empty(NUM_POINTS, dtype=np.uint8)
         
     def connect(self):
         """Connexion au serveur CI-V"""
@@ -63,27 +89,30 @@ class IC705SpectrumDisplay:
         print(f"✅ Connecté à {HOST}:{PORT}")
         
     def decode_bcd_frequency(self, freq_bytes):
-        """Décode la fréquence BCD little-endian"""
+        """Décode la fréquence BCD little-endian (5 octets, déroulé)"""
         try:
-            freq = 0
-            multiplier = 1
-            for byte in freq_bytes:
-                freq += (byte & 0x0F) * multiplier
-                multiplier *= 10
-                freq += ((byte >> 4) & 0x0F) * multiplier
-                multiplier *= 10
+            b0, b1, b2, b3, b4 = freq_bytes
+            freq = (
+                (b0 & 0x0F) + (b0 >> 4) * 10
+                + (b1 & 0x0F) * 100 + (b1 >> 4) * 1_000
+                + (b2 & 0x0F) * 10_000 + (b2 >> 4) * 100_000
+                + (b3 & 0x0F) * 1_000_000 + (b3 >> 4) * 10_000_000
+                + (b4 & 0x0F) * 100_000_000 + (b4 >> 4) * 1_000_000_000
+            )
             return freq / 1_000_000.0
         except:
             return None
     
     def encode_bcd_frequency(self, freq_mhz):
-        """Encode une fréquence en BCD little-endian"""
-        freq_hz = int(freq_mhz * 1_000_000)
-        bcd = bytearray(5)
-        for i in range(5):
-            bcd[i] = (freq_hz % 10) | ((freq_hz // 10 % 10) << 4)
-            freq_hz //= 100
-        return bytes(bcd)
+        """Encode une fréquence en BCD little-endian (5 octets, déroulé)"""
+        f = int(freq_mhz * 1_000_000)
+        return bytes((
+            (f % 10) | (f // 10 % 10) << 4,
+            (f // 100 % 10) | (f // 1_000 % 10) << 4,
+            (f // 10_000 % 10) | (f // 100_000 % 10) << 4,
+            (f // 1_000_000 % 10) | (f // 10_000_000 % 10) << 4,
+            (f // 100_000_000 % 10) | (f // 1_000_000_000 % 10) << 4,
+        ))
     
     def get_initial_frequency(self):
         """Récupère la fréquence initiale"""
@@ -154,30 +183,30 @@ class IC705SpectrumDisplay:
         spectrum = None
         freq = None
         
-        # Parser les messages dans le buffer
-        while len(self.msg_buffer) >= 6:
-            # Chercher le début d'un message
-            try:
-                start = self.msg_buffer.index(0xFE)
-                if start > 0:
-                    del self.msg_buffer[:start]
-            except ValueError:
-                self.msg_buffer.clear()
+        # Parser les messages dans le buffer : un curseur avance sur les
+        # trames et le préfixe consommé n'est supprimé qu'une seule fois
+        # à la fin (chaque del décale tout le reste du bytearray)
+        buf = self.msg_buffer
+        taille = len(buf)
+        pos = 0
+        while taille - pos >= 6:
+            # Chercher le préambule FE FE : une seule recherche C du
+            # motif 2 octets au lieu d'un index(0xFE) + vérification
+            start = buf.find(b'\xFE\xFE', pos)
+            if start < 0:
+                # Garder le dernier octet, possible début de préambule
+                pos = taille - 1
                 break
-            
-            if len(self.msg_buffer) < 2 or self.msg_buffer[1] != 0xFE:
-                del self.msg_buffer[:1]
-                continue
-            
+
             # Chercher la fin
-            try:
-                end = self.msg_buffer.index(0xFD, 2) + 1
-            except ValueError:
-                break  # Message incomplet
-            
+            end = buf.find(0xFD, start + 2)
+            if end < 0:
+                pos = start  # Message incomplet
+                break
+
             # Extraire le message
-            msg = bytes(self.msg_buffer[:end])
-            del self.msg_buffer[:end]
+            msg = bytes(buf[start:end + 1])
+            pos = end + 1
             
             if len(msg) < 5:
                 continue
@@ -196,19 +225,38 @@ class IC705SpectrumDisplay:
                 amp_data = msg[19:-1]
                 if len(amp_data) >= 10:
                     raw_len = len(amp_data)
+                    raw = np.frombuffer(amp_data, dtype=np.uint8)
                     if raw_len >= NUM_POINTS:
-                        indices = np.linspace(0, raw_len - 1, NUM_POINTS, dtype=int)
-                        spectrum = np.array([amp_data[i] for i in indices], dtype=np.float32)
+                        if raw_len != self._indices_len:
+                            self._indices = np.linspace(0, raw_len - 1, NUM_POINTS, dtype=int)
+                            self._indices_len = raw_len
+                        np.take(raw, self._indices, out=self._spectrum_buf, mode='clip')
                     else:
-                        spectrum = np.zeros(NUM_POINTS, dtype=np.float32)
-                        spectrum[:raw_len] = list(amp_data)
+                        self._spectrum_buf[:] = 0
+                        self._spectrum_buf[:raw_len] = raw
+                    spectrum = self._spectrum_buf
         
+        # Supprimer tout le préfixe consommé en une seule opération
+        del buf[:pos]
+
         # Limiter la taille du buffer
         if len(self.msg_buffer) > 10000:
             self.msg_buffer.clear()
         
         return spectrum, freq
     
+    def reception_loop(self):
+        """Boucle du thread de réception : recv + parsing en continu.
+
+        Tourne en tâche de fond pour que l'attente réseau ne bloque
+        jamais le repaint matplotlib (et inversement). Le spectre est
+        copié avant dépôt car le tampon préalloué est réutilisé.
+        """
+        while self.running:
+            spectrum, _ = self.read_and_parse_data()
+            if spectrum is not None:
+                self.spectra.append(spectrum.copy())
+
     def setup_figure(self):
         """Configure la figure matplotlib"""
         plt.style.use('dark_background')
@@ -224,8 +272,8 @@ class IC705SpectrumDisplay:
         )
         
         # === Spectre ===
-        self.line, = self.ax1.plot(self.freq_axis, self.spectrum_data, 
-                                    color='#FFFF00', linewidth=1)
+        self.line, = self.ax1.plot(self.freq_axis, self.spectrum_data,
+                                    color='#FFFF00', linewidth=1, animated=True)
         self.center_line = self.ax1.axvline(x=self.center_freq_mhz, color='#FF0000',
                                              linewidth=1.5, linestyle='--', alpha=0.7)
         self.ax1.set_xlim(self.freq_axis[0], self.freq_axis[-1])
@@ -239,17 +287,22 @@ class IC705SpectrumDisplay:
         self.ax1.xaxis.set_major_formatter(ticker.FormatStrFormatter('%.3f'))
         
         # === Waterfall ===
+        # Image RGBA : matplotlib saute entièrement l'étape norm+cmap
         self.waterfall_img = self.ax2.imshow(
-            self.waterfall_data, aspect='auto', cmap=wfview_cmap,
+            self.wf_rgba, aspect='auto',
             extent=[self.freq_axis[0], self.freq_axis[-1], WATERFALL_DEPTH, 0],
-            vmin=0, vmax=200, interpolation='bilinear', origin='upper'
+            interpolation='nearest', origin='upper',
+            animated=True
         )
         self.ax2.set_xlabel('Fréquence (MHz)')
         self.ax2.set_ylabel('Temps')
         self.ax2.set_title('Waterfall')
         self.ax2.ticklabel_format(useOffset=False, style='plain')
         self.ax2.xaxis.set_major_formatter(ticker.FormatStrFormatter('%.3f'))
-        plt.colorbar(self.waterfall_img, ax=self.ax2, label='Amplitude')
+        # La colorbar s'appuie sur un mappable dédié (l'image est RGBA)
+        mappable = plt.cm.ScalarMappable(cmap=wfview_cmap,
+                                         norm=plt.Normalize(0, 200))
+        plt.colorbar(mappable, ax=self.ax2, label='Amplitude')
         
         # === Contrôles ===
         plt.subplots_adjust(bottom=0.15)
@@ -284,7 +337,12 @@ class IC705SpectrumDisplay:
         self._on_freq_submit(self.freq_textbox.text)
     
     def update_freq_axis(self):
-        """Met à jour l'axe des fréquences"""
+        """Met à jour l'axe des fréquences (seulement si elle a changé)"""
+        # Ne toucher aux artistes des axes que si la fréquence appliquée
+        # diffère réellement : chaque setter invalide le rendu complet
+        if self._applied_freq == self.center_freq_mhz:
+            return
+        self._applied_freq = self.center_freq_mhz
         self.freq_axis = np.linspace(
             self.center_freq_mhz - SPAN_KHZ/2000,
             self.center_freq_mhz + SPAN_KHZ/2000,
@@ -297,6 +355,9 @@ class IC705SpectrumDisplay:
         self.waterfall_img.set_extent([self.freq_axis[0], self.freq_axis[-1], WATERFALL_DEPTH, 0])
         self.ax2.set_xlim(self.freq_axis[0], self.freq_axis[-1])
         self.freq_textbox.set_val(f'{self.center_freq_mhz:.6f}')
+        # Les axes ont changé : forcer un rendu complet (le blit ne
+        # redessine que les deux artistes animés)
+        self.fig.canvas.draw_idle()
     
     def animate(self, frame):
         """Fonction d'animation appelée par FuncAnimation"""
@@ -308,20 +369,30 @@ class IC705SpectrumDisplay:
             self.set_frequency(self.new_freq_to_set)
             self.new_freq_to_set = None
         
-        # Demander la fréquence périodiquement
-        if self.frame_count % 10 == 0:
+        # Demander la fréquence toutes les secondes (horloge murale :
+        # le rythme d'interrogation ne dépend plus du rythme de dessin)
+        maintenant = time.monotonic()
+        if maintenant >= self._next_freq_poll:
             self.request_frequency()
+            self._next_freq_poll = maintenant + 1.0
         
-        # Lire et parser les données
-        spectrum, freq = self.read_and_parse_data()
+        # Récupérer le spectre le plus récent produit par le thread de
+        # réception : le recv n'attend plus jamais derrière le repaint
+        try:
+            spectrum = self.spectra.pop()
+            self.spectra.clear()  # Abandonner les trames plus anciennes
+        except IndexError:
+            spectrum = None
         
         # Mettre à jour si nouvelles données
         if spectrum is not None:
             self.spectrum_data = spectrum
             
-            # Scroll waterfall
-            self.waterfall_data[1:] = self.waterfall_data[:-1]
-            self.waterfall_data[0] = spectrum
+            # Scroll waterfall : anneau, on écrit une seule ligne au lieu
+            # de recopier tout le tableau à chaque trame. La colormap est
+            # appliquée ici même, par un gather dans la table RGBA
+            self.wf_head = (self.wf_head - 1) % WATERFALL_DEPTH
+            self.wf_rgba[self.wf_head] = self._lut[spectrum]
             
             # Mettre à jour l'axe si fréquence changée
             if abs(self.center_freq_mhz - self.last_freq) > 0.0001:
@@ -330,7 +401,9 @@ class IC705SpectrumDisplay:
             
             # Mettre à jour les graphiques
             self.line.set_ydata(self.spectrum_data)
-            self.waterfall_img.set_data(self.waterfall_data)
+            # Remettre l'anneau dans l'ordre chronologique au moment de
+            # l'affichage seulement (np.roll = une paire de memcpy en C)
+            self.waterfall_img.set_data(np.roll(self.wf_rgba, -self.wf_head, axis=0))
             
             self.frame_count += 1
             if self.frame_count % 100 == 0:
@@ -355,7 +428,12 @@ class IC705SpectrumDisplay:
             
             # Streaming
             self.start_streaming()
-            
+
+            # Thread de réception en tâche de fond
+            self.reader_thread = threading.Thread(target=self.reception_loop,
+                                                  daemon=True)
+            self.reader_thread.start()
+
             # Figure
             self.setup_figure()
             
@@ -366,7 +444,7 @@ class IC705SpectrumDisplay:
                 self.fig,
                 self.animate,
                 interval=ANIMATION_INTERVAL,
-                blit=False,  # blit=False pour mise à jour complète
+                blit=True,  # ne redessiner que la ligne et le waterfall
                 cache_frame_data=False
             )
             
@@ -384,6 +462,8 @@ class IC705SpectrumDisplay:
     def cleanup(self):
         """Nettoyage"""
         self.running = False
+        if self.reader_thread is not None:
+            self.reader_thread.join(timeout=1.0)
         if self.sock:
             try:
                 self.stop_streaming()
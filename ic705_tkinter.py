@@ -11,12 +11,21 @@ Date: Décembre 2025
 
 import tkinter as tk
 from tkinter import ttk, messagebox
+import selectors
 import socket
 import time
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import threading
+
+# Accélération optionnelle : si Numba est installé, le scan des trames
+# tourne en code natif (module ic705_numba). Sinon on garde le Python.
+try:
+    from ic705_numba import (find_messages as _find_messages_njit,
+                             process_frame as _process_frame_njit)
+except ImportError:
+    _find_messages_njit = None
+    _process_frame_njit = None
 
 # ============================================================
 #                    PARAMÈTRES DE CONFIGURATION
@@ -32,67 +41,112 @@ FREQUENCE_DEFAUT = 145.000
 ADRESSE_RADIO = 0xA4
 ADRESSE_PC = 0xE0
 
+# Décalages de l'axe des fréquences autour du centre (immuables) :
+# l'axe complet s'obtient par une simple addition vectorisée
+# freq_centrale + _DECALAGES_FREQ, sans refaire de linspace
+_DECALAGES_FREQ = np.linspace(-SPAN_KHZ / 2000, SPAN_KHZ / 2000, LARGEUR_SPECTRE)
+
+# Table amplitude -> pixel RGBA précalculée : les 256 valeurs possibles
+# d'un octet passées dans viridis sur l'échelle 0..200. L'image reçoit
+# directement des pixels uint8, matplotlib n'a plus de Normalize ni de
+# colormap à appliquer à chaque frame
+_LUT_WATERFALL = (plt.get_cmap('viridis')(
+    np.clip(np.arange(256) / 200.0, 0.0, 1.0)) * 255).astype(np.uint8)
+
 
 # ============================================================
 #              FONCTIONS CI-V (Communication avec la radio)
 # ============================================================
 
 def decoder_frequence_bcd(octets_frequence):
-    """Décode une fréquence BCD little-endian en MHz."""
-    frequence_hz = 0
-    multiplicateur = 1
-    for octet in octets_frequence:
-        chiffre_bas = octet & 0x0F
-        frequence_hz += chiffre_bas * multiplicateur
-        multiplicateur *= 10
-        chiffre_haut = (octet >> 4) & 0x0F
-        frequence_hz += chiffre_haut * multiplicateur
-        multiplicateur *= 10
+    """Décode une fréquence BCD little-endian (5 octets) en MHz.
+
+    La longueur étant fixe, la boucle est déroulée en une expression :
+    chaque nibble est multiplié par son poids décimal, sans boucle
+    Python ni multiplicateur incrémental.
+    """
+    b0, b1, b2, b3, b4 = octets_frequence
+    frequence_hz = (
+        (b0 & 0x0F) + (b0 >> 4) * 10
+        + (b1 & 0x0F) * 100 + (b1 >> 4) * 1_000
+        + (b2 & 0x0F) * 10_000 + (b2 >> 4) * 100_000
+        + (b3 & 0x0F) * 1_000_000 + (b3 >> 4) * 10_000_000
+        + (b4 & 0x0F) * 100_000_000 + (b4 >> 4) * 1_000_000_000
+    )
     return frequence_hz / 1_000_000
 
 
 def trouver_messages_civ(buffer):
-    """Trouve et extrait les messages CI-V complets."""
+    """Trouve et extrait les messages CI-V complets.
+
+    Une seule passe : find() (recherche C) localise le préambule FE FE
+    puis le FD de fin, un curseur avance de trame en trame, et le
+    préfixe consommé n'est supprimé qu'une fois à la fin — pas de
+    décalage du buffer à chaque message.
+    """
     messages = []
+
+    # Chemin compilé : le scan FE FE ... FD tourne en code natif
+    if _find_messages_njit is not None:
+        instantane = bytes(buffer)
+        tableau = np.frombuffer(instantane, dtype=np.uint8)
+        debuts, fins, pos = _find_messages_njit(tableau, 0)
+        for d, f in zip(debuts, fins):
+            messages.append(instantane[d:f])
+        del buffer[:pos]
+        return messages
+
+    pos = 0
     while True:
-        try:
-            debut = buffer.index(0xFE)
-        except ValueError:
+        debut = buffer.find(b'\xFE\xFE', pos)
+        if debut < 0:
+            # Garder le dernier octet : possible premier FE d'un
+            # préambule coupé en deux par le recv
+            pos = max(pos, len(buffer) - 1)
             break
-        if debut > 0:
-            del buffer[:debut]
-        if len(buffer) < 2:
+        fin = buffer.find(0xFD, debut + 2)
+        if fin < 0:
+            pos = debut  # Message incomplet, attendre la suite
             break
-        if buffer[1] != 0xFE:
-            del buffer[:1]
-            continue
-        try:
-            fin = buffer.index(0xFD, 2) + 1
-        except ValueError:
-            break
-        messages.append(bytes(buffer[:fin]))
-        del buffer[:fin]
+        messages.append(bytes(buffer[debut:fin + 1]))
+        pos = fin + 1
+    del buffer[:pos]
     return messages
 
 
 def extraire_donnees_spectre(message):
-    """Extrait les données d'amplitude d'un message de spectre."""
+    """Extrait les données d'amplitude d'un message de spectre.
+
+    np.frombuffer lit les octets directement, sans liste Python
+    intermédiaire ni conversion par élément. Le résultat reste en
+    uint8 de bout en bout : les amplitudes tiennent sur un octet et
+    imshow comme plot les acceptent tels quels.
+    """
     if len(message) < 50:
         return None
-    donnees = message[19:-1]
-    if len(donnees) < 10:
+    if len(message) - 20 < 10:
         return None
-    return np.array(list(donnees), dtype=float)
+    return np.frombuffer(message, dtype=np.uint8,
+                         offset=19, count=len(message) - 20)
+
+
+# Cache des indices de sous-échantillonnage : la taille des trames est
+# quasi constante, le linspace n'est calculé qu'à la première trame
+_INDEX_CACHE = {}
 
 
 def redimensionner_spectre(amplitudes, taille):
     """Redimensionne le spectre à la taille voulue."""
     n = len(amplitudes)
     if n >= taille:
-        indices = np.linspace(0, n - 1, taille, dtype=int)
+        cle = (n, taille)
+        indices = _INDEX_CACHE.get(cle)
+        if indices is None:
+            indices = np.linspace(0, n - 1, taille, dtype=np.intp)
+            _INDEX_CACHE[cle] = indices
         return amplitudes[indices]
     else:
-        resultat = np.zeros(taille)
+        resultat = np.zeros(taille, dtype=amplitudes.dtype)
         resultat[:n] = amplitudes
         return resultat
 
@@ -116,7 +170,15 @@ class IC705App:
         self.connecte = False
         self.affichage_actif = False
         self.freq_centrale = FREQUENCE_DEFAUT
-        self.thread_affichage = None
+        # L'affichage est pompé depuis la boucle Tk (root.after), pas
+        # depuis un thread : matplotlib n'est pas thread-safe
+        self.selecteur = None
+        self.buffer_reception = bytearray()
+        # Tampon de réception fixe : recv_into écrit dedans au lieu
+        # d'allouer un nouvel objet bytes à chaque recv
+        self.tampon_recv = bytearray(65536)
+        self.vue_recv = memoryview(self.tampon_recv)
+        self.fig = None
         
         # Créer l'interface
         self.creer_interface()
@@ -234,25 +296,54 @@ class IC705App:
             self.connexion = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             self.connexion.settimeout(3)
             self.connexion.connect((ip, port))
-            
-            # Activer le streaming
+
+            # TCP_NODELAY : les petites commandes CI-V partent sans le
+            # délai de Nagle ; gros buffers noyau pour les rafales de
+            # spectre. Protégé : certaines plateformes n'exposent pas
+            # ces constantes
+            try:
+                self.connexion.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                self.connexion.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+                self.connexion.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 1 << 18)
+            except (AttributeError, OSError):
+                pass
+
+
+            # Activer le streaming puis demander la fréquence, envoyés
+            # dos à dos (TCP_NODELAY les fait partir immédiatement)
             cmd = bytes([0xFE, 0xFE, ADRESSE_RADIO, ADRESSE_PC, 0x1A, 0x05, 0x00, 0x01, 0xFD])
             self.connexion.send(cmd)
-            time.sleep(0.3)
-            
-            # Demander la fréquence
             cmd = bytes([0xFE, 0xFE, ADRESSE_RADIO, ADRESSE_PC, 0x03, 0xFD])
             self.connexion.send(cmd)
-            time.sleep(0.2)
-            
+
+            # Une seule boucle de lecture à échéance courte remplace les
+            # deux sleep aveugles (0,5 s à chaque connexion) : on sort
+            # dès que la trame 0x03 est arrivée
             try:
-                reponse = self.connexion.recv(1024)
-                for i in range(len(reponse) - 10):
-                    if reponse[i] == 0xFE and reponse[i+1] == 0xFE and reponse[i+4] == 0x03:
-                        self.freq_centrale = decoder_frequence_bcd(reponse[i+5:i+10])
+                self.connexion.settimeout(0.05)
+                reponse = bytearray()
+                date_limite = time.monotonic() + 0.3
+                freq_trouvee = False
+                while not freq_trouvee and time.monotonic() < date_limite:
+                    try:
+                        morceau = self.connexion.recv(4096)
+                    except socket.timeout:
+                        continue
+                    if not morceau:
                         break
+                    reponse.extend(morceau)
+                    for i in range(len(reponse) - 10):
+                        if reponse[i] == 0xFE and reponse[i+1] == 0xFE and reponse[i+4] == 0x03:
+                            # memoryview : la tranche BCD est passée au
+                            # décodeur sans copier les octets
+                            self.freq_centrale = decoder_frequence_bcd(
+                                memoryview(reponse)[i+5:i+10])
+                            freq_trouvee = True
+                            break
             except:
                 pass
+            finally:
+                self.connexion.settimeout(3)
             
             # Mise à jour interface
             self.connecte = True
@@ -301,25 +392,47 @@ class IC705App:
         """Lance l'affichage du spectre dans une nouvelle fenêtre."""
         self.affichage_actif = True
         self.btn_afficher.config(text="⏹ Arrêter", bg='#6e2a2a')
-        
-        # Lancer dans un thread séparé
-        self.thread_affichage = threading.Thread(target=self.boucle_affichage, daemon=True)
-        self.thread_affichage.start()
-    
+
+        # Créer la figure sur le thread principal (matplotlib n'est pas
+        # thread-safe), puis pomper les données depuis la boucle Tk
+        self.creer_figure_spectre()
+
+        # Socket non bloquant interrogé via selectors : pas de thread
+        # dédié, pas de plt.pause, pas de timeout-exception par tour
+        self.connexion.setblocking(False)
+        self.selecteur = selectors.DefaultSelector()
+        self.selecteur.register(self.connexion, selectors.EVENT_READ)
+        self.buffer_reception.clear()
+
+        self.root.after(5, self.pomper_donnees)
+
     def arreter_affichage(self):
         """Arrête l'affichage."""
         self.affichage_actif = False
+        if self.selecteur is not None:
+            try:
+                self.selecteur.unregister(self.connexion)
+            except (KeyError, ValueError):
+                pass
+            self.selecteur.close()
+            self.selecteur = None
+        if self.connexion is not None:
+            try:
+                self.connexion.setblocking(True)
+                self.connexion.settimeout(3)
+            except OSError:
+                pass
         self.btn_afficher.config(text="📊 Afficher Spectre", bg='#2a6e4a')
         plt.close('all')
-    
-    def boucle_affichage(self):
-        """Boucle d'affichage du spectre (exécutée dans un thread)."""
-        
-        # Calculer l'axe des fréquences
-        demi_span = SPAN_KHZ / 2000
-        freq_min = self.freq_centrale - demi_span
-        freq_max = self.freq_centrale + demi_span
-        axe_freq = np.linspace(freq_min, freq_max, LARGEUR_SPECTRE)
+
+    def creer_figure_spectre(self):
+        """Crée la figure spectre + waterfall et ses tampons."""
+
+        # Calculer l'axe des fréquences par translation des décalages
+        # précalculés
+        axe_freq = self.freq_centrale + _DECALAGES_FREQ
+        freq_min = axe_freq[0]
+        freq_max = axe_freq[-1]
         
         # Créer la figure matplotlib
         fig, (ax_spectre, ax_waterfall) = plt.subplots(2, 1, figsize=(10, 6))
@@ -336,64 +449,183 @@ class IC705App:
         ax_spectre.tick_params(colors='white')
         ax_spectre.grid(True, alpha=0.3)
         ax_spectre.axvline(x=self.freq_centrale, color='red', linestyle='--', alpha=0.7)
-        ligne, = ax_spectre.plot(axe_freq, np.zeros(LARGEUR_SPECTRE), color='yellow', linewidth=1)
+        ligne, = ax_spectre.plot(axe_freq, np.zeros(LARGEUR_SPECTRE),
+                                 color='yellow', linewidth=1, animated=True)
         
         # Configurer le waterfall
         ax_waterfall.set_xlabel('Fréquence (MHz)', color='white')
         ax_waterfall.set_ylabel('Temps', color='white')
         ax_waterfall.tick_params(colors='white')
         
-        waterfall_data = np.zeros((PROFONDEUR_WATERFALL, LARGEUR_SPECTRE))
+        # Waterfall en uint8 (les amplitudes tiennent sur un octet) et
+        # géré en tampon circulaire : une seule ligne écrite par trame
+        # au lieu de recopier toute la matrice
+        waterfall_data = np.zeros((PROFONDEUR_WATERFALL, LARGEUR_SPECTRE), dtype=np.uint8)
+        tete_waterfall = 0
+        # Tampon d'affichage préalloué : la concaténation des deux
+        # tranches de l'anneau écrit toujours dans le même tableau,
+        # set_data voit donc le même objet à chaque frame
+        waterfall_affichage = np.zeros_like(waterfall_data)
+        # Tampon de spectre préalloué pour le noyau fusionné Numba
+        spectre_buf = np.empty(LARGEUR_SPECTRE, dtype=np.uint8)
+        # Pixels RGBA préalloués : la LUT convertit les amplitudes en
+        # couleurs avant de les donner à matplotlib
+        waterfall_rgba = np.empty(
+            (PROFONDEUR_WATERFALL, LARGEUR_SPECTRE, 4), dtype=np.uint8)
+        waterfall_rgba[:] = _LUT_WATERFALL[0]
+        # Le tampon RGBA est réécrit sur place à chaque frame puis
+        # repassé à set_data (imshow copie son entrée, l'image ne rend
+        # pas le tampon d'origine). Pas de cmap ni de vmin/vmax : la
+        # LUT a déjà fait la conversion, set_data sur du RGBA saute
+        # tout le pipeline Normalize+cmap
         image = ax_waterfall.imshow(
-            waterfall_data, aspect='auto', cmap='viridis',
-            vmin=0, vmax=200, origin='upper',
-            extent=[freq_min, freq_max, PROFONDEUR_WATERFALL, 0]
+            waterfall_rgba, aspect='auto', origin='upper',
+            extent=[freq_min, freq_max, PROFONDEUR_WATERFALL, 0],
+            interpolation='nearest', animated=True
         )
-        
+
         plt.tight_layout()
         plt.ion()
         plt.show()
-        
-        # Buffer de réception
-        buffer = bytearray()
-        self.connexion.settimeout(0.1)
-        
-        # Boucle principale
-        while self.affichage_actif and plt.fignum_exists(fig.number):
+
+        # Fonds pour le blitting : tout ce qui ne bouge pas (axes,
+        # grille, titres) est capturé une fois ; la boucle ne redessine
+        # ensuite que la ligne et l'image par-dessus
+        fonds = {}
+
+        def capturer_fonds():
+            fig.canvas.draw()
+            fonds['spectre'] = fig.canvas.copy_from_bbox(ax_spectre.bbox)
+            fonds['waterfall'] = fig.canvas.copy_from_bbox(ax_waterfall.bbox)
+
+        capturer_fonds()
+        # Un redimensionnement de la fenêtre invalide les fonds
+        fig.canvas.mpl_connect('resize_event', lambda event: fonds.clear())
+
+        # Tout garder sur l'instance pour la pompe Tk
+        self.fig = fig
+        self.ax_spectre = ax_spectre
+        self.ax_waterfall = ax_waterfall
+        self.ligne = ligne
+        self.image = image
+        self.waterfall_data = waterfall_data
+        self.waterfall_affichage = waterfall_affichage
+        self.waterfall_rgba = waterfall_rgba
+        self.tete_waterfall = tete_waterfall
+        self.spectre_buf = spectre_buf
+        self.fonds = fonds
+        self.capturer_fonds = capturer_fonds
+        # Cadence de dessin plafonnée à 30 images/s : le waterfall
+        # enregistre toutes les trames, mais on ne dessine pas plus vite
+        # que l'œil ne regarde
+        self.prochain_dessin = 0.0
+
+    def pomper_donnees(self):
+        """Pompe appelée par la boucle Tk : recv, parse, affiche, se replanifie."""
+        if (not self.affichage_actif or self.connexion is None
+                or not plt.fignum_exists(self.fig.number)):
+            if self.affichage_actif or self.selecteur is not None:
+                self.arreter_affichage()
+            return
+
+        fig = self.fig
+        ax_spectre = self.ax_spectre
+        ax_waterfall = self.ax_waterfall
+        ligne = self.ligne
+        image = self.image
+        waterfall_data = self.waterfall_data
+        waterfall_affichage = self.waterfall_affichage
+        waterfall_rgba = self.waterfall_rgba
+        tete_waterfall = self.tete_waterfall
+        spectre_buf = self.spectre_buf
+        fonds = self.fonds
+        capturer_fonds = self.capturer_fonds
+        buffer = self.buffer_reception
+
+        # Ramasser tout ce qui est prêt, sans jamais bloquer la boucle Tk
+        # (recv_into remplit le tampon fixe : aucune allocation par recv)
+        while self.selecteur.select(timeout=0):
             try:
-                data = self.connexion.recv(4096)
-                buffer.extend(data)
-            except socket.timeout:
-                pass
-            except:
+                n = self.connexion.recv_into(self.vue_recv)
+            except BlockingIOError:
                 break
-            
-            # Parser les messages
-            messages = trouver_messages_civ(buffer)
-            
-            for msg in messages:
-                if len(msg) >= 5 and msg[4] == 0x27 and len(msg) > 50:
+            except OSError:
+                self.arreter_affichage()
+                return
+            if n == 0:
+                self.arreter_affichage()
+                return
+            buffer.extend(self.vue_recv[:n])
+
+        # Parser les messages
+        messages = trouver_messages_civ(buffer)
+
+        spectre_a_afficher = None
+        for msg in messages:
+            if len(msg) >= 5 and msg[4] == 0x27 and len(msg) > 50:
+                # La tête recule dans l'anneau : la ligne libérée
+                # reçoit directement la nouvelle trame
+                tete_suivante = (tete_waterfall - 1) % PROFONDEUR_WATERFALL
+
+                if _process_frame_njit is not None:
+                    # Noyau fusionné : extraction, sous-échantillonnage
+                    # et écriture des deux sorties en une seule passe
+                    # compilée, sans tableau intermédiaire
+                    _process_frame_njit(
+                        np.frombuffer(msg, dtype=np.uint8)[19:-1],
+                        spectre_buf, waterfall_data[tete_suivante],
+                        LARGEUR_SPECTRE)
+                    spectre = spectre_buf
+                else:
                     amplitudes = extraire_donnees_spectre(msg)
-                    if amplitudes is not None:
-                        spectre = redimensionner_spectre(amplitudes, LARGEUR_SPECTRE)
-                        
-                        # Scroll waterfall
-                        waterfall_data[1:] = waterfall_data[:-1]
-                        waterfall_data[0] = spectre
-                        
-                        # Mettre à jour
-                        ligne.set_ydata(spectre)
-                        image.set_data(waterfall_data)
-                        
-                        plt.draw()
-                        plt.pause(0.001)
-            
-            if len(buffer) > 10000:
-                buffer.clear()
-        
-        # Fermer proprement
-        self.affichage_actif = False
-        self.root.after(0, lambda: self.btn_afficher.config(text="📊 Afficher Spectre", bg='#2a6e4a'))
+                    if amplitudes is None:
+                        continue
+                    spectre = redimensionner_spectre(amplitudes, LARGEUR_SPECTRE)
+                    waterfall_data[tete_suivante] = spectre
+
+                tete_waterfall = tete_suivante
+                spectre_a_afficher = spectre
+
+        self.tete_waterfall = tete_waterfall
+
+        # Dessiner au plus toutes les 33 ms : chaque trame est dans le
+        # waterfall, mais seule la plus récente est effectivement tracée
+        if (spectre_a_afficher is not None
+                and time.monotonic() >= self.prochain_dessin):
+            self.prochain_dessin = time.monotonic() + 1 / 30
+
+            # Mettre à jour (une concaténation remet l'anneau
+            # dans l'ordre chronologique, dans le tampon préalloué)
+            ligne.set_ydata(spectre_a_afficher)
+            np.concatenate(
+                (waterfall_data[tete_waterfall:],
+                 waterfall_data[:tete_waterfall]),
+                out=waterfall_affichage)
+            # Conversion amplitude -> RGBA par la LUT, dans le tampon
+            # de pixels préalloué ; set_data est nécessaire (l'image
+            # rend une copie interne, pas le tampon) mais reste sur le
+            # chemin RGBA direct, sans Normalize ni cmap
+            np.take(_LUT_WATERFALL, waterfall_affichage, axis=0,
+                    out=waterfall_rgba)
+            image.set_data(waterfall_rgba)
+
+            # Blitting : restaurer les fonds puis ne
+            # redessiner que les deux artistes animés
+            if not fonds:
+                capturer_fonds()
+            fig.canvas.restore_region(fonds['spectre'])
+            fig.canvas.restore_region(fonds['waterfall'])
+            ax_spectre.draw_artist(ligne)
+            ax_waterfall.draw_artist(image)
+            fig.canvas.blit(ax_spectre.bbox)
+            fig.canvas.blit(ax_waterfall.bbox)
+            fig.canvas.flush_events()
+
+        if len(buffer) > 10000:
+            buffer.clear()
+
+        # Se replanifier dans la boucle Tk
+        self.root.after(5, self.pomper_donnees)
     
     def quitter(self):
         """Ferme l'application proprement."""
@@ -20,6 +20,7 @@ import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.figure import Figure
 import threading
+import queue
 
 # ============================================================
 #                    PARAMÈTRES DE CONFIGURATION
@@ -41,63 +42,114 @@ ADRESSE_PC = 0xE0
 # ============================================================
 
 def decoder_frequence_bcd(octets_frequence):
-    """Décode une fréquence BCD little-endian en MHz."""
-    frequence_hz = 0
-    multiplicateur = 1
-    for octet in octets_frequence:
-        chiffre_bas = octet & 0x0F
-        frequence_hz += chiffre_bas * multiplicateur
-        multiplicateur *= 10
-        chiffre_haut = (octet >> 4) & 0x0F
-        frequence_hz += chiffre_haut * multiplicateur
-        multiplicateur *= 10
+    """Décode une fréquence BCD little-endian en MHz.
+
+    Les 10 chiffres sont évalués d'un bloc dans une seule expression
+    (pas de boucle ni de multiplicateur incrémental) : chaque octet
+    porte deux chiffres dont les poids sont connus d'avance.
+    """
+    b0 = octets_frequence[0]
+    b1 = octets_frequence[1]
+    b2 = octets_frequence[2]
+    b3 = octets_frequence[3]
+    b4 = octets_frequence[4]
+    frequence_hz = ((b0 & 0x0F)
+                    + (b0 >> 4) * 10
+                    + (b1 & 0x0F) * 100
+                    + (b1 >> 4) * 1_000
+                    + (b2 & 0x0F) * 10_000
+                    + (b2 >> 4) * 100_000
+                    + (b3 & 0x0F) * 1_000_000
+                    + (b3 >> 4) * 10_000_000
+                    + (b4 & 0x0F) * 100_000_000
+                    + (b4 >> 4) * 1_000_000_000)
     return frequence_hz / 1_000_000
 
 
-def trouver_messages_civ(buffer):
-    """Trouve et extrait les messages CI-V complets."""
+def trouver_messages_civ(buffer, reprise=0):
+    """Trouve et extrait les messages CI-V complets.
+
+    Une seule passe : find() (recherche C) localise le préambule FE FE
+    puis le FD de fin, un curseur avance de trame en trame, et le
+    préfixe consommé n'est supprimé qu'une fois à la fin — pas de
+    décalage du buffer à chaque message.
+
+    Le parseur garde son état entre les appels via `reprise` : quand
+    une trame est incomplète, la position déjà scannée est retournée
+    et repassée au prochain appel, la recherche du FD final ne repart
+    donc pas du début de la trame à chaque recv. Chaque octet n'est
+    examiné qu'une seule fois.
+
+    Retourne (messages, reprise) ; l'appelant repasse `reprise` tel
+    quel (et le remet à 0 s'il vide le buffer lui-même).
+    """
     messages = []
+    pos = 0
     while True:
-        try:
-            debut = buffer.index(0xFE)
-        except ValueError:
+        debut = buffer.find(b'\xFE\xFE', pos)
+        if debut < 0:
+            # Garder le dernier octet : possible premier FE d'un
+            # préambule coupé en deux par le recv
+            pos = max(pos, len(buffer) - 1)
+            reprise = 0
             break
-        if debut > 0:
-            del buffer[:debut]
-        if len(buffer) < 2:
+        fin = buffer.find(0xFD, max(debut + 2, debut + reprise))
+        if fin < 0:
+            # Message incomplet : attendre la suite, en notant jusqu'où
+            # le FD a déjà été cherché (relatif au début de la trame,
+            # qui sera ramenée en tête de buffer par le del ci-dessous)
+            pos = debut
+            reprise = len(buffer) - debut
             break
-        if buffer[1] != 0xFE:
-            del buffer[:1]
-            continue
-        try:
-            fin = buffer.index(0xFD, 2) + 1
-        except ValueError:
-            break
-        messages.append(bytes(buffer[:fin]))
-        del buffer[:fin]
-    return messages
+        messages.append(bytes(buffer[debut:fin + 1]))
+        pos = fin + 1
+        reprise = 0
+    del buffer[:pos]
+    return messages, reprise
 
 
 def extraire_donnees_spectre(message):
-    """Extrait les données d'amplitude d'un message de spectre."""
+    """Extrait les données d'amplitude d'un message de spectre.
+
+    np.frombuffer lit les octets sans passer par une liste Python ni
+    aucun cast : les amplitudes tiennent sur un octet, on les garde
+    en uint8 jusqu'à l'affichage.
+    """
     if len(message) < 50:
         return None
-    donnees = message[19:-1]
-    if len(donnees) < 10:
+    n = len(message) - 20
+    if n < 10:
         return None
-    return np.array(list(donnees), dtype=float)
+    return np.frombuffer(message, dtype=np.uint8, offset=19, count=n)
+
+
+# Poids d'interpolation précalculés : pour un couple de longueurs
+# donné, chaque point cible se résume à deux indices sources et une
+# fraction, figés une fois pour toutes — np.interp n'a plus de
+# recherche à refaire à chaque trame
+_POIDS_INTERP = {}
 
 
 def redimensionner_spectre(amplitudes, taille):
-    """Redimensionne le spectre à la taille voulue."""
+    """Redimensionne le spectre à la taille voulue.
+
+    Interpolation linéaire avec poids en cache : deux lectures
+    indexées vectorisées et une combinaison, sans recherche par point.
+    """
     n = len(amplitudes)
-    if n >= taille:
-        indices = np.linspace(0, n - 1, taille, dtype=int)
-        return amplitudes[indices]
-    else:
-        resultat = np.zeros(taille)
-        resultat[:n] = amplitudes
-        return resultat
+    if n == taille:
+        return amplitudes
+    cle = (n, taille)
+    poids = _POIDS_INTERP.get(cle)
+    if poids is None:
+        pos = np.linspace(0.0, n - 1, taille)
+        lo = pos.astype(np.int32)
+        hi = np.minimum(lo + 1, n - 1)
+        frac = (pos - lo).astype(np.float32)
+        poids = (lo, hi, frac)
+        _POIDS_INTERP[cle] = poids
+    lo, hi, frac = poids
+    return (1.0 - frac) * amplitudes[lo] + frac * amplitudes[hi]
 
 
 # ============================================================
@@ -121,15 +173,28 @@ class IC705App:
         self.freq_centrale = FREQUENCE_DEFAUT
         self.thread_reception = None
         
-        # Données du spectre
-        self.spectre_actuel = np.zeros(LARGEUR_SPECTRE)
-        self.waterfall_data = np.zeros((PROFONDEUR_WATERFALL, LARGEUR_SPECTRE))
-        self.nouvelles_donnees = False
+        # Données du spectre (float32 pour la courbe, uint8 pour le
+        # waterfall : les amplitudes sources tiennent sur un octet et
+        # imshow accepte l'uint8 tel quel — huit fois moins de mémoire
+        # à décaler et à dessiner que du float64)
+        self.spectre_actuel = np.zeros(LARGEUR_SPECTRE, dtype=np.float32)
+        # Waterfall géré en tampon circulaire : _wf_head pointe la ligne
+        # la plus récente, on écrit une seule ligne par trame au lieu de
+        # décaler toute la matrice
+        self.waterfall_data = np.zeros((PROFONDEUR_WATERFALL, LARGEUR_SPECTRE),
+                                       dtype=np.uint8)
+        self._wf_head = 0
+        # Remise des trames au thread GUI : une file d'une seule place,
+        # le thread de réception jette la trame précédente si elle n'a
+        # pas encore été consommée — pas d'indicateur partagé ni de
+        # frame déchirée par une lecture en cours d'écriture
+        self._file_spectres = queue.Queue(maxsize=1)
         
         # Paramètres de gain
         self.gain_min = 20
         self.gain_max = 120
-        
+        self._slider_after = None  # Débounce des sliders (id d'un after en attente)
+
         # Créer l'interface
         self.creer_interface()
         self.creer_graphique()
@@ -272,12 +337,24 @@ class IC705App:
         
         # Mettre à jour le label
         self.label_gain.config(text=f"[{self.gain_min} - {self.gain_max}]")
-        
-        # Mettre à jour les graphiques
+
+        # Débounce : le callback est appelé à chaque pixel du glissement,
+        # le redessin (coûteux) n'est fait qu'après 50 ms de calme
+        if self._slider_after is not None:
+            self.root.after_cancel(self._slider_after)
+        self._slider_after = self.root.after(50, self._appliquer_gain)
+
+    def _appliquer_gain(self):
+        """Applique la plage de gain aux graphiques (une fois la rafale
+        d'événements slider terminée)."""
+        self._slider_after = None
+        # Les fonds capturés ne sont plus valables après un changement
+        # d'échelle
         self.ax_spectre.set_ylim(self.gain_min, self.gain_max)
         self.image.set_clim(vmin=self.gain_min, vmax=self.gain_max)
+        self.fonds.clear()
         self.canvas.draw_idle()
-    
+
     def creer_graphique(self):
         """Crée le graphique matplotlib intégré dans Tkinter."""
         
@@ -301,7 +378,9 @@ class IC705App:
         self.ax_spectre.tick_params(colors='white')
         self.ax_spectre.grid(True, alpha=0.3)
         self.ax_spectre.axvline(x=self.freq_centrale, color='red', linestyle='--', alpha=0.7)
-        self.ligne, = self.ax_spectre.plot(self.axe_freq, self.spectre_actuel, color='yellow', linewidth=1)
+        self.ligne, = self.ax_spectre.plot(self.axe_freq, self.spectre_actuel,
+                                           color='yellow', linewidth=1,
+                                           animated=True)
         
         # Waterfall
         self.ax_waterfall = self.fig.add_subplot(212)
@@ -316,15 +395,44 @@ class IC705App:
             cmap='viridis',
             vmin=self.gain_min, vmax=self.gain_max,
             origin='upper',
-            extent=[freq_min, freq_max, PROFONDEUR_WATERFALL, 0]
+            extent=[freq_min, freq_max, PROFONDEUR_WATERFALL, 0],
+            animated=True
         )
-        
+
         self.fig.tight_layout()
-        
+
         # Intégrer dans Tkinter
         self.canvas = FigureCanvasTkAgg(self.fig, master=self.root)
         self.canvas.draw()
         self.canvas.get_tk_widget().pack(fill='both', expand=True, padx=10, pady=10)
+
+        # Fonds pour le blitting : capturés paresseusement (une fois la
+        # fenêtre réellement affichée) et invalidés au redimensionnement
+        self.fonds = {}
+        self.canvas.mpl_connect('resize_event', lambda event: self.fonds.clear())
+
+    def capturer_fonds(self):
+        """Capture les fonds fixes des deux axes pour le blitting."""
+        self.canvas.draw()
+        self.fonds['spectre'] = self.canvas.copy_from_bbox(self.ax_spectre.bbox)
+        self.fonds['waterfall'] = self.canvas.copy_from_bbox(self.ax_waterfall.bbox)
+
+    def dessiner_artistes(self):
+        """Redessine la ligne et le waterfall par blitting.
+
+        Les fonds (axes, grille, titres) sont restaurés d'un bloc puis
+        seuls les deux artistes animés sont retracés — le rendu ne
+        coûte plus que ce qui a changé, pas la figure entière.
+        """
+        if not self.fonds:
+            self.capturer_fonds()
+        self.canvas.restore_region(self.fonds['spectre'])
+        self.canvas.restore_region(self.fonds['waterfall'])
+        self.ax_spectre.draw_artist(self.ligne)
+        self.ax_waterfall.draw_artist(self.image)
+        self.canvas.blit(self.ax_spectre.bbox)
+        self.canvas.blit(self.ax_waterfall.bbox)
+        self.canvas.flush_events()
     
     def mettre_a_jour_axe_freq(self):
         """Met à jour l'axe des fréquences quand la fréquence centrale change."""
@@ -342,6 +450,7 @@ class IC705App:
         self.ax_spectre.set_title(f'Spectre IC-705 - {self.freq_centrale:.3f} MHz', color='white')
         self.image.set_extent([freq_min, freq_max, PROFONDEUR_WATERFALL, 0])
         self.ax_waterfall.set_xlim(freq_min, freq_max)
+        self.fonds.clear()
         self.canvas.draw()
     
     def toggle_connexion(self):
@@ -447,17 +556,28 @@ class IC705App:
         """Boucle de réception des données (thread secondaire - PAS de GUI ici)."""
         buffer = bytearray()
         self.connexion.settimeout(0.1)
-        
+
+        # Tampon de réception préalloué : recv_into écrit dedans
+        # directement, sans allouer un objet bytes par appel
+        tampon_recv = bytearray(65536)
+        vue_recv = memoryview(tampon_recv)
+
+        # État du parseur entre deux recv (position déjà scannée d'une
+        # trame incomplète)
+        reprise = 0
+
         while self.affichage_actif and self.connecte:
             try:
-                data = self.connexion.recv(4096)
-                buffer.extend(data)
+                n = self.connexion.recv_into(vue_recv)
+                if n == 0:
+                    break
+                buffer.extend(vue_recv[:n])
             except socket.timeout:
                 continue
             except:
                 break
             
-            messages = trouver_messages_civ(buffer)
+            messages, reprise = trouver_messages_civ(buffer, reprise)
             
             for msg in messages:
                 if len(msg) >= 5 and msg[4] == 0x27 and len(msg) > 50:
@@ -465,28 +585,49 @@ class IC705App:
                     if amplitudes is not None:
                         spectre = redimensionner_spectre(amplitudes, LARGEUR_SPECTRE)
                         
-                        # Mettre à jour les données (thread-safe via variables)
-                        self.spectre_actuel = spectre
-                        self.waterfall_data[1:] = self.waterfall_data[:-1]
-                        self.waterfall_data[0] = spectre
-                        self.nouvelles_donnees = True
+                        # Déposer la trame finie pour le thread GUI ;
+                        # si la précédente attend encore, on la retire
+                        # avant de déposer la nouvelle (seule la plus
+                        # récente compte à l'écran — même schéma que
+                        # pousser_spectre dans ic705_avec_sliders.py)
+                        try:
+                            self._file_spectres.put_nowait(spectre)
+                        except queue.Full:
+                            try:
+                                self._file_spectres.get_nowait()
+                                self._file_spectres.put_nowait(spectre)
+                            except (queue.Empty, queue.Full):
+                                pass
             
             if len(buffer) > 10000:
                 buffer.clear()
+                reprise = 0
     
     def mettre_a_jour_affichage(self):
         """Met à jour l'affichage (appelé dans le thread principal via after)."""
         if not self.affichage_actif:
             return
         
-        if self.nouvelles_donnees:
+        try:
+            spectre = self._file_spectres.get_nowait()
+        except queue.Empty:
+            spectre = None
+
+        if spectre is not None:
+            # L'anneau est mis à jour ici, dans le thread principal :
+            # aucune écriture concurrente sur waterfall_data
+            self.spectre_actuel = spectre
+            self._wf_head = (self._wf_head - 1) % PROFONDEUR_WATERFALL
+            self.waterfall_data[self._wf_head] = spectre
+
             # Mettre à jour les données graphiques
-            self.ligne.set_data(self.axe_freq, self.spectre_actuel)
-            self.image.set_data(self.waterfall_data)
-            
-            # Redessiner le canvas (thread-safe car dans le thread principal)
-            self.canvas.draw_idle()
-            self.nouvelles_donnees = False
+            self.ligne.set_data(self.axe_freq, spectre)
+            # np.roll remet l'anneau dans l'ordre chronologique
+            # (une copie, au lieu d'un décalage complet par trame)
+            self.image.set_data(np.roll(self.waterfall_data, -self._wf_head, axis=0))
+
+            # Blitting : seuls les artistes modifiés sont redessinés
+            self.dessiner_artistes()
         
         # Planifier la prochaine mise à jour (30ms = ~33 FPS)
         self.root.after(30, self.mettre_a_jour_affichage)
@@ -16,6 +16,7 @@ import tkinter as tk
 from tkinter import messagebox, ttk, filedialog
 import socket
 import threading
+import queue
 import time
 import numpy as np
 import csv
@@ -56,75 +57,114 @@ def decoder_frequence_bcd(data):
     """
     Décode une fréquence en BCD (5 octets) vers MHz.
     Format: Hz(2) kHz(2) MHz(1-2) x10MHz x100MHz
+
+    Les 5 octets sont chargés dans un seul entier puis tous les
+    chiffres sont combinés en parallèle (technique SWAR) : chaque
+    étape masque/addition fusionne des paires de voies adjacentes,
+    en temps constant, sans boucle ni allocation.
     """
     if len(data) < 5:
         return FREQUENCE_DEFAUT
-    
-    freq_hz = 0
-    for i, byte in enumerate(data[:5]):
-        low = byte & 0x0F
-        high = (byte >> 4) & 0x0F
-        factor = 10 ** (i * 2)
-        freq_hz += low * factor + high * factor * 10
-    
+
+    v = int.from_bytes(data[:5], 'little')
+    # Chaque octet devient la valeur de ses deux chiffres (0..99)
+    v = (v & 0x0F0F0F0F0F) + ((v >> 4) & 0x0F0F0F0F0F) * 10
+    # Paires d'octets -> valeurs 0..9999 dans des voies de 16 bits
+    v = (v & 0x00FF00FF00FF) + ((v >> 8) & 0x00FF00FF00FF) * 100
+    # Paires de voies 16 bits -> voies de 32 bits
+    v = (v & 0x0000FFFF0000FFFF) + ((v >> 16) & 0x0000FFFF0000FFFF) * 10_000
+    freq_hz = (v & 0xFFFFFFFF) + (v >> 32) * 100_000_000
+
     return freq_hz / 1_000_000
 
 
-def trouver_messages_civ(buffer):
+def trouver_messages_civ(buffer, reprise=0):
     """
     Extrait tous les messages CI-V complets d'un buffer.
-    Retourne la liste des messages trouvés et nettoie le buffer.
+    Retourne (messages, reprise) et nettoie le buffer.
+
+    Une seule passe : un curseur avance de trame en trame via find()
+    (recherche C) et le préfixe consommé n'est supprimé qu'une fois à
+    la fin — pas de décalage du buffer à chaque message.
+
+    Le parseur garde son état entre les appels via `reprise` : quand
+    une trame est incomplète, la position déjà scannée est retournée
+    et repassée au prochain appel, la recherche du FD final ne repart
+    donc pas du début de la trame à chaque recv. Chaque octet n'est
+    examiné qu'une seule fois. L'appelant repasse `reprise` tel quel
+    (et le remet à 0 s'il vide le buffer lui-même).
     """
     messages = []
-    
+    pos = 0
     while True:
-        debut = buffer.find(bytes([0xFE, 0xFE]))
-        if debut == -1:
-            buffer.clear()
+        debut = buffer.find(b'\xFE\xFE', pos)
+        if debut < 0:
+            # Garder le dernier octet : possible premier FE d'un
+            # préambule coupé en deux par le recv
+            pos = max(pos, len(buffer) - 1)
+            reprise = 0
             break
-        
-        if debut > 0:
-            del buffer[:debut]
-        
-        fin = buffer.find(bytes([0xFD]))
-        if fin == -1:
+        fin = buffer.find(0xFD, max(debut + 2, debut + reprise))
+        if fin < 0:
+            # Message incomplet : attendre la suite, en notant jusqu'où
+            # le FD a déjà été cherché (relatif au début de la trame,
+            # qui sera ramenée en tête de buffer par le del ci-dessous)
+            pos = debut
+            reprise = len(buffer) - debut
             break
-        
-        message = bytes(buffer[:fin + 1])
-        messages.append(message)
-        del buffer[:fin + 1]
-    
-    return messages
+        messages.append(bytes(buffer[debut:fin + 1]))
+        pos = fin + 1
+        reprise = 0
+    del buffer[:pos]
+    return messages, reprise
 
 
 def extraire_donnees_spectre(msg):
     """
     Extrait les amplitudes d'une trame spectre (commande 0x27).
+
+    np.frombuffer lit directement les octets de la trame, sans liste
+    Python intermédiaire ni cast : les amplitudes tiennent sur un
+    octet, on les garde en uint8 jusqu'à l'affichage.
     """
     if len(msg) < 20:
         return None
-    
-    idx_start = 14
-    idx_end = len(msg) - 1
-    
-    if idx_start >= idx_end:
+
+    n = len(msg) - 15
+    if n <= 0:
         return None
-    
-    return np.array(list(msg[idx_start:idx_end]), dtype=np.float32)
+
+    return np.frombuffer(msg, dtype=np.uint8, offset=14, count=n)
+
+
+# Poids d'interpolation précalculés : pour un couple de longueurs
+# donné, chaque point cible se résume à deux indices sources et une
+# fraction, figés une fois pour toutes — np.interp n'a plus de
+# recherche à refaire à chaque trame
+_POIDS_INTERP = {}
 
 
 def redimensionner_spectre(donnees, largeur_cible):
     """
-    Redimensionne un spectre à la largeur souhaitée par interpolation.
+    Redimensionne un spectre à la largeur souhaitée par interpolation
+    linéaire, avec les poids en cache : deux lectures indexées
+    vectorisées et une combinaison, sans recherche par point.
     """
     if donnees is None or len(donnees) == 0:
         return np.zeros(largeur_cible)
-    
-    x_original = np.linspace(0, 1, len(donnees))
-    x_nouveau = np.linspace(0, 1, largeur_cible)
-    resultat = np.interp(x_nouveau, x_original, donnees)
-    
-    return resultat
+
+    n = len(donnees)
+    cle = (n, largeur_cible)
+    poids = _POIDS_INTERP.get(cle)
+    if poids is None:
+        pos = np.linspace(0.0, n - 1, largeur_cible)
+        lo = pos.astype(np.int32)
+        hi = np.minimum(lo + 1, n - 1)
+        frac = (pos - lo).astype(np.float32)
+        poids = (lo, hi, frac)
+        _POIDS_INTERP[cle] = poids
+    lo, hi, frac = poids
+    return (1.0 - frac) * donnees[lo] + frac * donnees[hi]
 
 
 def trame_vers_hex(msg):
@@ -179,16 +219,29 @@ class IC705App:
         self.freq_centrale = FREQUENCE_DEFAUT
         self.thread_reception = None
         
-        # Données du spectre
-        self.spectre_actuel = np.zeros(LARGEUR_SPECTRE)
-        self.waterfall_data = np.zeros((PROFONDEUR_WATERFALL, LARGEUR_SPECTRE))
-        self.nouvelles_donnees = False
+        # Données du spectre (float32 pour la courbe, uint8 pour le
+        # waterfall : les amplitudes sources tiennent sur un octet et
+        # imshow accepte l'uint8 tel quel — huit fois moins de mémoire
+        # que du float64 dans le chemin d'affichage)
+        self.spectre_actuel = np.zeros(LARGEUR_SPECTRE, dtype=np.float32)
+        # Waterfall géré en tampon circulaire : _wf_head pointe la ligne
+        # la plus récente, on écrit une seule ligne par trame au lieu de
+        # décaler toute la matrice
+        self.waterfall_data = np.zeros((PROFONDEUR_WATERFALL, LARGEUR_SPECTRE),
+                                       dtype=np.uint8)
+        self._wf_head = 0
+        # Remise des trames au thread GUI : une file d'une seule place,
+        # le thread de réception jette la trame précédente si elle n'a
+        # pas encore été consommée — pas d'indicateur partagé ni de
+        # frame déchirée par une lecture en cours d'écriture
+        self._file_spectres = queue.Queue(maxsize=1)
         self.nouvelle_frequence = None  # Fréquence reçue du thread
         
         # Paramètres de gain (pour les sliders)
         self.gain_min = 0
         self.gain_max = 200
-        
+        self._slider_after = None  # Débounce des sliders (id d'un after en attente)
+
         # File des trames à afficher (thread-safe)
         self.trames_a_logger = []
         self.lock_trames = threading.Lock()
@@ -598,14 +651,24 @@ class IC705App:
         
         # Mettre à jour le label
         self.label_gain.config(text=f"Plage: [{self.gain_min} - {self.gain_max}]")
-        
-        # Mettre à jour les graphiques si créés
+
+        # Débounce : le callback est appelé à chaque pixel du glissement,
+        # le redessin (coûteux) n'est fait qu'après 50 ms de calme
+        if self._slider_after is not None:
+            self.root.after_cancel(self._slider_after)
+        self._slider_after = self.root.after(50, self._appliquer_gain)
+
+    def _appliquer_gain(self):
+        """Applique la plage de gain aux graphiques (une fois la rafale
+        d'événements slider terminée)."""
+        self._slider_after = None
         if hasattr(self, 'ax_spectre'):
             self.ax_spectre.set_ylim(self.gain_min, self.gain_max)
             self.image.set_clim(vmin=self.gain_min, vmax=self.gain_max)
-            # Forcer le redessin
+            # Les limites changent : les fonds de blitting sont périmés
+            self.fonds.clear()
             self.canvas.draw()
-    
+
     def creer_graphique(self):
         """Crée le graphique matplotlib intégré dans Tkinter - COPIE EXACTE de ic705_simple.py."""
         
@@ -638,8 +701,11 @@ class IC705App:
         # Ligne verticale rouge au centre - IDENTIQUE à ic705_simple.py
         self.ax_spectre.axvline(x=self.freq_centrale, color='red', linestyle='--', alpha=0.7)
         
-        # Créer la ligne du spectre - IDENTIQUE à ic705_simple.py
-        self.ligne, = self.ax_spectre.plot(self.axe_freq, np.zeros(LARGEUR_SPECTRE), color='yellow', linewidth=1)
+        # Créer la ligne du spectre (animated=True : dessinée par
+        # blitting uniquement)
+        self.ligne, = self.ax_spectre.plot(self.axe_freq, np.zeros(LARGEUR_SPECTRE),
+                                           color='yellow', linewidth=1,
+                                           animated=True)
         
         # Configurer le waterfall - IDENTIQUE à ic705_simple.py
         self.ax_waterfall.set_title('Waterfall', color='white')
@@ -655,16 +721,45 @@ class IC705App:
             cmap='viridis',
             vmin=0, vmax=200,  # IDENTIQUE à ic705_simple.py
             origin='upper',
-            extent=[freq_min, freq_max, PROFONDEUR_WATERFALL, 0]
+            extent=[freq_min, freq_max, PROFONDEUR_WATERFALL, 0],
+            animated=True
         )
-        
+
         # Ajuster le layout - IDENTIQUE à ic705_simple.py
         self.fig.tight_layout()
-        
+
         # Intégrer dans Tkinter
         self.canvas = FigureCanvasTkAgg(self.fig, master=self.frame_graph)
         self.canvas.draw()
         self.canvas.get_tk_widget().pack(fill='both', expand=True)
+
+        # Fonds pour le blitting : capturés paresseusement (une fois la
+        # fenêtre réellement affichée) et invalidés au redimensionnement
+        self.fonds = {}
+        self.canvas.mpl_connect('resize_event', lambda event: self.fonds.clear())
+
+    def capturer_fonds(self):
+        """Capture les fonds fixes des deux axes pour le blitting."""
+        self.canvas.draw()
+        self.fonds['spectre'] = self.canvas.copy_from_bbox(self.ax_spectre.bbox)
+        self.fonds['waterfall'] = self.canvas.copy_from_bbox(self.ax_waterfall.bbox)
+
+    def dessiner_artistes(self):
+        """Redessine la ligne et le waterfall par blitting.
+
+        Les fonds (axes, grille, titres) sont restaurés d'un bloc puis
+        seuls les deux artistes animés sont retracés — le rendu ne
+        coûte plus que ce qui a changé, pas la figure entière.
+        """
+        if not self.fonds:
+            self.capturer_fonds()
+        self.canvas.restore_region(self.fonds['spectre'])
+        self.canvas.restore_region(self.fonds['waterfall'])
+        self.ax_spectre.draw_artist(self.ligne)
+        self.ax_waterfall.draw_artist(self.image)
+        self.canvas.blit(self.ax_spectre.bbox)
+        self.canvas.blit(self.ax_waterfall.bbox)
+        self.canvas.flush_events()
     
     def mettre_a_jour_axe_freq(self):
         """Met à jour l'axe des fréquences quand la fréquence centrale change."""
@@ -683,6 +778,8 @@ class IC705App:
                                    color='white', fontsize=12, fontweight='bold')
         self.image.set_extent([freq_min, freq_max, PROFONDEUR_WATERFALL, 0])
         self.ax_waterfall.set_xlim(freq_min, freq_max)
+        # L'extent et les limites changent : fonds de blitting périmés
+        self.fonds.clear()
         self.canvas.draw()
     
     def toggle_connexion(self):
@@ -817,11 +914,22 @@ class IC705App:
         
         # Compteur pour demander la fréquence périodiquement
         compteur_freq = 0
-        
+
+        # Tampon de réception préalloué : recv_into écrit dedans
+        # directement, sans allouer un objet bytes par appel
+        tampon_recv = bytearray(65536)
+        vue_recv = memoryview(tampon_recv)
+
+        # État du parseur entre deux recv (position déjà scannée d'une
+        # trame incomplète)
+        reprise = 0
+
         while self.affichage_actif and self.connecte:
             try:
-                data = self.connexion.recv(4096)
-                buffer.extend(data)
+                n = self.connexion.recv_into(vue_recv)
+                if n == 0:
+                    break
+                buffer.extend(vue_recv[:n])
             except socket.timeout:
                 # Demander la fréquence toutes les ~20 itérations (2 secondes)
                 compteur_freq += 1
@@ -836,7 +944,7 @@ class IC705App:
             except:
                 break
             
-            messages = trouver_messages_civ(buffer)
+            messages, reprise = trouver_messages_civ(buffer, reprise)
             
             for msg in messages:
                 # Créer l'entrée de log avec timestamp
@@ -864,17 +972,27 @@ class IC705App:
                     if amplitudes is not None:
                         spectre = redimensionner_spectre(amplitudes, LARGEUR_SPECTRE)
                         
-                        self.spectre_actuel = spectre.copy()
-                        self.waterfall_data[1:] = self.waterfall_data[:-1]
-                        self.waterfall_data[0] = spectre.copy()
-                        self.nouvelles_donnees = True
-                        
+                        # Déposer la trame finie pour le thread GUI ;
+                        # si la précédente attend encore, on la retire
+                        # avant de déposer la nouvelle (seule la plus
+                        # récente compte à l'écran — même schéma que
+                        # pousser_spectre dans ic705_avec_sliders.py)
+                        try:
+                            self._file_spectres.put_nowait(spectre)
+                        except queue.Full:
+                            try:
+                                self._file_spectres.get_nowait()
+                                self._file_spectres.put_nowait(spectre)
+                            except (queue.Empty, queue.Full):
+                                pass
+
                         # Enregistrer dans le CSV si actif
                         if self.enregistrement_actif:
                             self.enregistrer_spectre(spectre)
             
             if len(buffer) > 10000:
                 buffer.clear()
+                reprise = 0
     
     def mettre_a_jour_affichage(self):
         """Met à jour l'affichage graphique - COPIE EXACTE de ic705_simple.py."""
@@ -889,19 +1007,29 @@ class IC705App:
                 self.label_freq.config(text=f"{self.freq_centrale:.3f} MHz")
             self.nouvelle_frequence = None
         
-        # Mettre à jour les graphiques - IDENTIQUE à ic705_simple.py
-        if self.nouvelles_donnees:
+        # Récupérer la dernière trame déposée par le thread de réception
+        try:
+            spectre = self._file_spectres.get_nowait()
+        except queue.Empty:
+            spectre = None
+
+        if spectre is not None:
+            # L'anneau est mis à jour ici, dans le thread principal :
+            # aucune écriture concurrente sur waterfall_data
+            self.spectre_actuel = spectre
+            self._wf_head = (self._wf_head - 1) % PROFONDEUR_WATERFALL
+            self.waterfall_data[self._wf_head] = spectre
+
             # Mettre à jour la ligne du spectre (fréquences en X, amplitudes en Y)
-            self.ligne.set_data(self.axe_freq, self.spectre_actuel)
-            
-            # Mettre à jour l'image du waterfall
-            self.image.set_data(self.waterfall_data)
-            
-            # Rafraîchir l'affichage - équivalent de plt.draw() + plt.pause()
-            self.canvas.draw()
-            self.canvas.flush_events()
-            
-            self.nouvelles_donnees = False
+            self.ligne.set_data(self.axe_freq, spectre)
+
+            # Mettre à jour l'image du waterfall (np.roll remet l'anneau
+            # dans l'ordre chronologique : une copie, au lieu d'un
+            # décalage complet par trame reçue)
+            self.image.set_data(np.roll(self.waterfall_data, -self._wf_head, axis=0))
+
+            # Blitting : seuls les deux artistes animés sont redessinés
+            self.dessiner_artistes()
         
         # Planifier la prochaine mise à jour
         self.root.after(30, self.mettre_a_jour_affichage)
@@ -1190,15 +1318,18 @@ class IC705App:
         self.label_freq.config(text="---")
         
         # Réinitialiser les données
-        self.spectre_actuel = np.zeros(LARGEUR_SPECTRE)
-        self.waterfall_data = np.zeros((PROFONDEUR_WATERFALL, LARGEUR_SPECTRE))
+        self.spectre_actuel = np.zeros(LARGEUR_SPECTRE, dtype=np.float32)
+        self.waterfall_data = np.zeros((PROFONDEUR_WATERFALL, LARGEUR_SPECTRE),
+                                       dtype=np.uint8)
+        self._wf_head = 0
         self.freq_centrale = FREQUENCE_DEFAUT
         self.mettre_a_jour_axe_freq()
         
-        # Rafraîchir l'affichage
+        # Rafraîchir l'affichage (les artistes animés ne sont dessinés
+        # que par blitting)
         self.ligne.set_data(self.axe_freq, self.spectre_actuel)
         self.image.set_data(self.waterfall_data)
-        self.canvas.draw_idle()
+        self.dessiner_artistes()
     
     def creer_controles_lecture(self):
         """Crée les contrôles pour naviguer da  ns le CSV."""
@@ -1347,7 +1478,10 @@ class IC705App:
             for line in self.ax_spectre.lines[1:]:
                 line.remove()
             self.ax_spectre.axvline(x=self.freq_centrale, color='red', linestyle='--', alpha=0.7, linewidth=2)
-        
+
+            # Axes et extent modifiés : fonds de blitting périmés
+            self.fonds.clear()
+
         # Mettre à jour le spectre actuel
         self.spectre_actuel = data['spectre']
         
@@ -1363,10 +1497,10 @@ class IC705App:
             if i < PROFONDEUR_WATERFALL:
                 self.waterfall_data[i] = line
         
-        # Mettre à jour l'affichage
+        # Mettre à jour l'affichage par blitting
         self.ligne.set_data(self.axe_freq, self.spectre_actuel)
         self.image.set_data(self.waterfall_data)
-        self.canvas.draw_idle()
+        self.dessiner_artistes()
         
         # Mettre à jour les labels
         self.label_freq.config(text=f"{self.freq_centrale:.3f} MHz")
@@ -31,6 +31,13 @@ matplotlib.use('TkAgg')
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 
+# Scanner de trames compilé (optionnel) : si Numba est installé, le
+# scan FE FE ... FD tourne en code natif, sinon repli en Python pur
+try:
+    from ic705_numba import find_messages as _find_messages_njit
+except ImportError:
+    _find_messages_njit = None
+
 
 # ============================================================
 #              PARAMÈTRES DE CONFIGURATION
@@ -74,57 +81,87 @@ def decoder_frequence_bcd(data):
 
 
 def trouver_messages_civ(buffer):
-    """Extrait tous les messages CI-V complets d'un buffer."""
+    """Extrait tous les messages CI-V complets d'un buffer.
+
+    Une seule passe : un curseur avance de trame en trame via find()
+    (recherche C) et le préfixe consommé n'est supprimé qu'une fois à
+    la fin — pas de décalage du buffer à chaque message.
+    """
     messages = []
-    
+
+    # Chemin compilé : le scan FE FE ... FD tourne en code natif
+    if _find_messages_njit is not None:
+        instantane = bytes(buffer)
+        tableau = np.frombuffer(instantane, dtype=np.uint8)
+        debuts, fins, pos = _find_messages_njit(tableau, 0)
+        for d, f in zip(debuts, fins):
+            messages.append(instantane[d:f])
+        del buffer[:pos]
+        return messages
+
+    pos = 0
     while True:
-        debut = buffer.find(bytes([0xFE, 0xFE]))
-        if debut == -1:
-            buffer.clear()
+        debut = buffer.find(b'\xFE\xFE', pos)
+        if debut < 0:
+            # Garder le dernier octet : possible premier FE d'un
+            # préambule coupé en deux par le recv
+            pos = max(pos, len(buffer) - 1)
             break
-        
-        if debut > 0:
-            del buffer[:debut]
-        
-        fin = buffer.find(bytes([0xFD]))
-        if fin == -1:
+        fin = buffer.find(0xFD, debut + 2)
+        if fin < 0:
+            pos = debut  # Message incomplet, attendre la suite
             break
-        
-        message = bytes(buffer[:fin + 1])
-        messages.append(message)
-        del buffer[:fin + 1]
-    
+        messages.append(bytes(buffer[debut:fin + 1]))
+        pos = fin + 1
+    del buffer[:pos]
     return messages
 
 
 def extraire_donnees_spectre(msg):
-    """Extrait les amplitudes d'une trame spectre (commande 0x27)."""
+    """Extrait les amplitudes d'une trame spectre (commande 0x27).
+
+    np.frombuffer lit directement les octets de la trame (pas de liste
+    Python intermédiaire), le seul coût restant est le cast en float32.
+    """
     if len(msg) < 20:
         return None
-    
-    idx_start = 19
-    idx_end = len(msg) - 1
-    
-    if idx_start >= idx_end:
+
+    n = len(msg) - 20
+    if n <= 0:
         return None
-    
-    return np.array(list(msg[idx_start:idx_end]), dtype=np.float32)
+
+    return np.frombuffer(msg, dtype=np.uint8, offset=19,
+                         count=n).astype(np.float32)
+
+
+# Poids d'interpolation précalculés : pour un couple de longueurs
+# donné, chaque point cible se résume à deux indices sources et une
+# fraction, figés une fois pour toutes — np.interp n'a plus de
+# recherche à refaire à chaque trame
+_POIDS_INTERP = {}
 
 
 def redimensionner_spectre(donnees, largeur_cible):
-    """Redimensionne un spectre à la largeur souhaitée."""
+    """Redimensionne un spectre à la largeur souhaitée.
+
+    Interpolation linéaire avec poids en cache : deux lectures
+    indexées vectorisées et une combinaison, sans recherche par point.
+    """
     if donnees is None or len(donnees) == 0:
         return np.zeros(largeur_cible)
-    
-    taille_originale = len(donnees)
-    
-    if taille_originale >= largeur_cible:
-        indices = np.linspace(0, taille_originale - 1, largeur_cible, dtype=int)
-        return donnees[indices]
-    else:
-        x_original = np.linspace(0, 1, len(donnees))
-        x_nouveau = np.linspace(0, 1, largeur_cible)
-        return np.interp(x_nouveau, x_original, donnees)
+
+    n = len(donnees)
+    cle = (n, largeur_cible)
+    poids = _POIDS_INTERP.get(cle)
+    if poids is None:
+        pos = np.linspace(0.0, n - 1, largeur_cible)
+        lo = pos.astype(np.int32)
+        hi = np.minimum(lo + 1, n - 1)
+        frac = (pos - lo).astype(np.float32)
+        poids = (lo, hi, frac)
+        _POIDS_INTERP[cle] = poids
+    lo, hi, frac = poids
+    return (1.0 - frac) * donnees[lo] + frac * donnees[hi]
 
 
 def trame_vers_hex(msg):
@@ -185,7 +222,10 @@ class IC705AppV4:
         self.waterfall_data = np.zeros((PROFONDEUR_WATERFALL, LARGEUR_SPECTRE))
         self.waterfall_time_labels = [""] * PROFONDEUR_WATERFALL
         self.waterfall_zoom_lignes = PROFONDEUR_WATERFALL
-        self.nouvelles_donnees = False
+        # Trames en attente d'affichage : le thread de réception les
+        # accumule, le tick GUI les applique toutes d'un coup (un seul
+        # décalage du waterfall par tick, pas un par trame)
+        self.spectres_en_attente = []
         self.lock_donnees = threading.Lock()
         self.derniere_ligne_rejouee = None
         self.slider_update_en_cours = False
@@ -199,7 +239,8 @@ class IC705AppV4:
         # Paramètres de gain
         self.gain_min = 0
         self.gain_max = 200
-        
+        self._slider_after = None  # Débounce des sliders (id d'un after en attente)
+
         # File des trames à afficher (thread-safe)
         self.trames_a_logger = []
         self.lock_trames = threading.Lock()
@@ -656,30 +697,39 @@ class IC705AppV4:
                 self.slider_min.set(self.db_min)
             
             self.label_gain.config(text=f"Plage (dB): [{self.db_min:.1f} - {self.db_max:.1f}]")
-            
-            if hasattr(self, 'ax_spectre'):
-                self.ax_spectre.set_ylim(self.db_min, self.db_max)
-                self.image_waterfall.set_clim(vmin=self.db_min, vmax=self.db_max)
-                self.canvas.draw_idle()
+        else:
+            self.gain_min = self.slider_min.get()
+            self.gain_max = self.slider_max.get()
+
+            if self.gain_min >= self.gain_max:
+                self.gain_min = self.gain_max - 10
+                self.slider_min.set(self.gain_min)
+
+            self.label_gain.config(text=f"Plage: [{self.gain_min} - {self.gain_max}]")
+
+        # Débounce : le callback est appelé à chaque pixel du glissement,
+        # le redessin complet n'est fait qu'après 50 ms de calme
+        if self._slider_after is not None:
+            self.root.after_cancel(self._slider_after)
+        self._slider_after = self.root.after(50, self._appliquer_gain)
+
+    def _appliquer_gain(self):
+        """Applique la plage courante (dB ou brute) aux graphiques, une
+        fois la rafale d'événements slider terminée."""
+        self._slider_after = None
+        if not hasattr(self, 'ax_spectre'):
             return
-        
-        self.gain_min = self.slider_min.get()
-        self.gain_max = self.slider_max.get()
-        
-        if self.gain_min >= self.gain_max:
-            self.gain_min = self.gain_max - 10
-            self.slider_min.set(self.gain_min)
-        
-        self.label_gain.config(text=f"Plage: [{self.gain_min} - {self.gain_max}]")
-        
-        if hasattr(self, 'ax_spectre'):
-            self.ax_spectre.set_ylim(self.gain_min, self.gain_max)
-            self.image_waterfall.set_clim(vmin=self.gain_min, vmax=self.gain_max)
-            self.canvas.draw()
-            # Recréer le background après modification
-            if hasattr(self, 'use_blit') and self.use_blit:
-                self.background = self.canvas.copy_from_bbox(self.fig.bbox)
-    
+        if self.affichage_db.get():
+            vmin, vmax = self.db_min, self.db_max
+        else:
+            vmin, vmax = self.gain_min, self.gain_max
+        self.ax_spectre.set_ylim(vmin, vmax)
+        self.image_waterfall.set_clim(vmin=vmin, vmax=vmax)
+        self.canvas.draw()
+        # Recréer le background après modification
+        if hasattr(self, 'use_blit') and self.use_blit:
+            self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+
     def creer_graphique(self):
         """Crée le graphique matplotlib - IDENTIQUE à ic705_simple.py."""
         
@@ -893,11 +943,18 @@ class IC705AppV4:
         buffer = bytearray()
         self.connexion.settimeout(0.1)
         compteur_freq = 0
-        
+
+        # Tampon de réception préalloué : recv_into écrit dedans
+        # directement, sans allouer un objet bytes par appel
+        tampon_recv = bytearray(65536)
+        vue_recv = memoryview(tampon_recv)
+
         while self.affichage_actif and self.connecte:
             try:
-                data = self.connexion.recv(4096)
-                buffer.extend(data)
+                n = self.connexion.recv_into(vue_recv)
+                if n == 0:
+                    break
+                buffer.extend(vue_recv[:n])
             except socket.timeout:
                 compteur_freq += 1
                 if compteur_freq >= 20:
@@ -945,11 +1002,13 @@ class IC705AppV4:
                     if amplitudes is not None:
                         spectre = redimensionner_spectre(amplitudes, LARGEUR_SPECTRE)
                         
+                        # Accumuler la trame : le waterfall n'est plus
+                        # touché ici, le tick GUI appliquera tout le
+                        # lot d'un coup
                         with self.lock_donnees:
-                            self.spectre_actuel = spectre.copy()
-                            self.waterfall_data[1:] = self.waterfall_data[:-1]
-                            self.waterfall_data[0] = spectre.copy()
-                            self.nouvelles_donnees = True
+                            self.spectres_en_attente.append(spectre)
+                            if len(self.spectres_en_attente) > PROFONDEUR_WATERFALL:
+                                del self.spectres_en_attente[0]
                         
                         # Enregistrer dans le CSV si actif
                         if self.enregistrement_actif:
@@ -971,15 +1030,24 @@ class IC705AppV4:
                 self.label_freq.config(text=f"{self.freq_centrale:.3f} MHz")
             self.nouvelle_frequence = None
         
-        # Mettre à jour les graphiques si nouvelles données
+        # Prendre tout le lot de trames arrivées depuis le dernier tick
         with self.lock_donnees:
-            if self.nouvelles_donnees:
-                spectre = self.spectre_actuel.copy()
-                waterfall = self.waterfall_data.copy()
-                self.nouvelles_donnees = False
-            else:
-                spectre = None
-                waterfall = None
+            lot = self.spectres_en_attente
+            self.spectres_en_attente = []
+
+        if lot:
+            # k trames reçues -> un seul décalage de k lignes, la plus
+            # récente en haut ; seul le thread GUI touche le waterfall
+            k = len(lot)
+            if k < PROFONDEUR_WATERFALL:
+                self.waterfall_data[k:] = self.waterfall_data[:-k]
+            self.waterfall_data[:k] = np.stack(lot[::-1])
+            self.spectre_actuel = lot[-1]
+            spectre = lot[-1]
+            waterfall = self.waterfall_data
+        else:
+            spectre = None
+            waterfall = None
         
         if spectre is not None:
             self.rafraichir_graphique(spectre, waterfall)